@@ -0,0 +1,259 @@
+"""Plotly figures of the dashboard, built from the frames prepared in pipeline.py."""
+
+import json
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+from dateutil.relativedelta import relativedelta
+from packaging.version import Version
+
+try:
+    import orjson
+except ImportError:  # figure_json falls back to plotly's serializer
+    orjson = None
+
+#Gantt chart colours per rollout stage
+ROLLOUT_COLORS = {
+    'In Experiment': 'rgba(255, 255, 0, 0.8)',
+    'Awaiting Results': 'rgba(87, 74, 217, 0.8)',
+    'Rollout': 'rgba(0, 165, 44, 0.8)',
+    'No Rollout': 'rgba(235,79,107,0.8)',
+    'Paused': 'rgba(122, 123, 127, 0.8)'
+}
+
+#Experiments table cell colour per stage, anything else is black
+STAGE_FILL_COLORS = {
+    "Completed": 'rgb(4,76,60)',
+    "Running": 'rgb(87,74,217)',  # Pastel blue
+    "Paused": 'rgba(235,79,107,255)',  # Pastel yellow
+}
+EXPERIMENT_TABLE_COLUMNS = ["INITIATIVE", "CITY", "STAGE", "SUB DOMAIN", "START DATE", "END DATE", "DURATION", "DAYS REMAINING"]
+
+# Label modes for the Gantt y labels: boxed annotations, one text trace, or boxed up to the limit
+LABEL_MODES = ("annotations", "text", "auto")
+ANNOTATION_LABEL_LIMIT = 300
+
+
+def rollout_label_annotations(labels):
+    #One boxed label per Gantt row, at the left edge of the plot
+    return [
+        dict(
+            x=0.005,  # Adjust this value to move the annotation left or right
+            y=i,
+            text=label,
+            showarrow=False,
+            bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
+            borderwidth=3,               # Width of the border
+            borderpad=1,                 # Padding between the text and the border
+            bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
+            xref="paper",
+            yref="y",
+            align="right",
+            xanchor="left",
+            yanchor="middle",
+            font=dict(family='PT Sans Narrow', size=12, color='rgb(19,230,143)')
+        )
+        for i, label in enumerate(labels)
+    ]
+
+
+def rollout_label_trace(labels, x):
+    #Every Gantt row label in a single text trace, no per-label layout objects
+    return go.Scatter(
+        x=[x] * len(labels),
+        y=labels,
+        text=labels,
+        mode="text",
+        textposition="middle right",
+        textfont=dict(family='PT Sans Narrow', size=12, color='rgb(4,76,60)'),
+        hoverinfo="skip",
+        showlegend=False,
+        cliponaxis=False,
+    )
+
+
+def rollout_figure(transformed_df, label_mode="auto"):
+    """Gantt chart of the rollout intervals, which must already be sorted by start.
+
+    The y labels are drawn in one batched step: all annotations assigned at once
+    ("annotations"), a single text trace ("text"), or annotations up to
+    ANNOTATION_LABEL_LIMIT rows and the text trace beyond ("auto").
+    """
+    if label_mode not in LABEL_MODES:
+        raise ValueError(f"label_mode must be one of {LABEL_MODES}, got {label_mode!r}")
+
+    fig2, unique_y_categories_ordered, x_start = rollout_base_figure(transformed_df)
+    if label_mode == "auto":
+        label_mode = "annotations" if len(unique_y_categories_ordered) <= ANNOTATION_LABEL_LIMIT else "text"
+    if label_mode == "annotations":
+        fig2.layout.annotations = rollout_label_annotations(unique_y_categories_ordered)
+    else:
+        fig2.add_trace(rollout_label_trace(unique_y_categories_ordered, x_start))
+    return fig2
+
+
+def rollout_base_figure(transformed_df):
+    #Gantt bars and layout without the y labels, plus the labels in axis order and the x-axis start
+    # plotly.express takes a while to import and only the Gantt needs it
+    import plotly.express as px
+
+    #Calculating the height of the graph, making sure it doesnt go below 300 height to prevent wierd lookig plots
+    height_number = max(len(transformed_df["Initiative-city-platform"].unique()), 1) * 30
+    height_number = max(height_number, 300)
+
+    # Calculate three months before the earliest date in the 'start' column
+    one_month_before = transformed_df['start'].min() - relativedelta(months=3)
+
+    fig2 = px.timeline(transformed_df, x_start="start", x_end="finish", y="Initiative-city-platform", color="stage",
+                       color_discrete_map=ROLLOUT_COLORS)
+
+    #add borders to the gantt chart
+    fig2.update_traces(marker_line_color='black', marker_line_width=2)
+
+    fig2.update_layout(
+        title="",
+        showlegend=False,
+        plot_bgcolor='rgb(19,230,143)',
+        height=height_number,
+        margin=dict(t=5),
+    )
+    fig2.update_yaxes(visible=False, showticklabels=False, tickfont=dict(family='PT Sans Narrow', size=12, color='white'))
+    fig2.update_xaxes(tickfont=dict(family='PT Sans Narrow', size=12, color='white'))
+
+    # Set the x-axis to start before the earliest date
+    fig2.update_xaxes(range=[one_month_before, transformed_df['finish'].max()])
+
+    fig2.update_xaxes(tickfont=dict(size=20))
+
+    #Getting the order of the ylabel ticks, removing duplicates while preserving order
+    unique_y_categories_ordered = list(OrderedDict.fromkeys(y for trace in fig2.data for y in trace.y))
+    return fig2, unique_y_categories_ordered, one_month_before
+
+
+def concurrency_figure(series):
+    """Step lines of the experiments running at once, one per column of ConcurrencySweep.series."""
+    fig = go.Figure([
+        go.Scatter(x=series.index, y=series[column].to_numpy(), name=str(column), mode="lines", line_shape="hv")
+        for column in series.columns
+    ])
+    fig.update_layout(
+        plot_bgcolor='rgb(19,230,143)',
+        height=400,
+        margin=dict(t=5),
+        hovermode="x unified",
+        showlegend=len(series.columns) > 1,
+        legend=dict(font=dict(family='PT Sans Narrow', size=14)),
+    )
+    fig.update_xaxes(tickfont=dict(family='PT Sans Narrow', size=14, color='white'))
+    fig.update_yaxes(rangemode="tozero", tickfont=dict(family='PT Sans Narrow', size=14, color='white'))
+    return fig
+
+
+def json_default(obj):
+    #Values orjson doesn't encode by itself: object arrays, pandas scalars and missing values
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def figure_json(fig):
+    """The figure as JSON text, encoded with orjson when it is installed.
+
+    Plotly's own orjson path first rewrites every nested value in Python, which costs
+    more than the encoding itself; here numpy arrays go straight to orjson.
+    """
+    if orjson is None:
+        return pio.to_json(fig, validate=False)
+    return orjson.dumps(fig.to_dict(), default=json_default,
+                        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Streamlit releases the PlotlyChart fast path was checked against, the message and
+# DeltaGenerator._enqueue are internals that can change in any minor release
+FAST_PATH_STREAMLIT = (Version("1.27"), Version("1.28"))
+
+
+def plotly_chart_proto():
+    #The PlotlyChart message class when this Streamlit has the fields plotly_chart fills, else None
+    if not FAST_PATH_STREAMLIT[0] <= Version(st.__version__) < FAST_PATH_STREAMLIT[1]:
+        return None
+    try:
+        from streamlit.proto.PlotlyChart_pb2 import PlotlyChart
+    except ImportError:
+        return None
+    fields = PlotlyChart.DESCRIPTOR.fields_by_name
+    if not {"figure", "use_container_width", "theme"} <= set(fields) or not hasattr(st._main, "_enqueue"):
+        return None
+    if not {"spec", "config"} <= set(fields["figure"].message_type.fields_by_name):
+        return None
+    return PlotlyChart
+
+
+PlotlyChartProto = plotly_chart_proto()
+
+
+def plotly_chart(spec, use_container_width=False, dg=None):
+    """Send an already serialized figure (see figure_json) to the browser.
+
+    st.plotly_chart copies the figure to a dict and encodes it again with the stdlib
+    json encoder on every run; this fills the same PlotlyChart message from the JSON text.
+    Outside FAST_PATH_STREAMLIT, or when the message has changed, it falls back to
+    st.plotly_chart with the decoded figure.
+    """
+    if PlotlyChartProto is None:
+        return (dg or st).plotly_chart(json.loads(spec), use_container_width=use_container_width)
+    proto = PlotlyChartProto()
+    proto.use_container_width = use_container_width
+    proto.figure.spec = spec
+    proto.figure.config = json.dumps({"showLink": False, "linkText": False})
+    proto.theme = "streamlit"
+    return (dg or st._main)._enqueue("plotly_chart", proto)
+
+
+def table_values(column):
+    #Cell values as sent to the browser: dates as text, missing values as empty cells
+    if pd.api.types.is_datetime64_any_dtype(column):
+        column = column.dt.strftime("%Y-%m-%d")
+    return column.astype(object).where(column.notna(), None).to_numpy()
+
+
+def experiment_links(frame):
+    #Initiative names linked to their experiment doc, built in one vectorized pass
+    return '<a href="' + frame["Experiment Doc Link"].astype(str) + '">' + frame["INITIATIVE"].astype(str) + '</a>'
+
+
+def experiments_table(frame):
+    """Table trace of the filtered experiments, next to the KPI tiles in fig1.
+
+    Cells keep their typed values; the bold text is a column-level prefix/suffix and
+    the fill colour comes from a lookup on STAGE, so no per-cell HTML is built. The
+    values go in as one 2-D array and the trace as a plain dict, so plotly validates
+    it once, when it is added to the figure, instead of element by element twice.
+    """
+    columns = {col: table_values(frame[col]) for col in EXPERIMENT_TABLE_COLUMNS}
+    columns["INITIATIVE"] = experiment_links(frame).to_numpy()
+    fill_colors = frame["STAGE"].astype(object).map(STAGE_FILL_COLORS).fillna('black')
+    return dict(
+        type="table",
+        domain=dict(x=[0, 0.495],
+                    y=[0, 1.0]),
+        header=dict(values=[f"<b>{col}</b>" for col in EXPERIMENT_TABLE_COLUMNS],
+                    fill_color='rgb(4,76,60)',
+                    align='center',
+                    font=dict(color='rgb(19,230,143)', size=14, family='PT Sans Narrow'),
+                    line_color='rgb(19,230,143)', line_width=2),
+        cells=dict(values=np.array(list(columns.values()), dtype=object).reshape(len(columns), len(frame)),
+                   prefix="<b>", suffix="</b>",
+                   fill_color=fill_colors.to_numpy(dtype=object).reshape(1, len(frame)),
+                   align='center',
+                   line_color='rgb(19,230,143)', line_width=2,
+                   font=dict(color='white', size=13, family='PT Sans Narrow')),
+    )
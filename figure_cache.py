@@ -0,0 +1,76 @@
+"""Serialized figures of the most requested views, shared by every session."""
+
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class FigureCache:
+    """LRU cache of figure JSON (see charts.figure_json) under a total size budget.
+
+    Keys are tuples of the figure name and its filter values, all under one data
+    version: the first lookup with another version drops every entry of the old one.
+    Sizes are the lengths of the JSON text; a spec larger than `max_bytes` is never kept.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _use_version(self, version):
+        if version != self.version:
+            if self.entries:
+                logger.info("Dropping %d cached figures of version %s", len(self.entries), self.version)
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            self.size = 0
+            self.version = version
+
+    def get(self, version, key):
+        with self._lock:
+            self._use_version(version)
+            spec = self.entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, version, key, spec):
+        #Stores and returns spec, evicting the least recently used figures past the budget
+        with self._lock:
+            self._use_version(version)
+            if len(spec) > self.max_bytes:
+                return spec
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self.entries[key] = spec
+            self.size += len(spec)
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+            return spec
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -1,20 +1,18 @@
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-import plotly.graph_objs as go
-from plotly.subplots import make_subplots
-import plotly.express as px
 from datetime import datetime
 import streamlit as st
-import re
-import calendar
-from plotly.graph_objs import Figure
-from dateutil.relativedelta import relativedelta
-from collections import OrderedDict
-from streamlit_gsheets import GSheetsConnection
-import gspread
-import json
-from google.oauth2.service_account import Credentials
+from plotly.graph_objects import Figure
+import time
+from sheets import ColumnReader, SheetCache, SheetsResource
+import settings
+from pipeline import (FILTER_DIMENSIONS, TABLE_SORT_COLUMNS, ConcurrencySweep, ExperimentCube, FilterIndex, RolloutTable,
+                      count_cells, page_count, prepare_experiments, prepare_weekly, summarize_cells, table_page)
+from schema import SCHEMA_VERSION, apply_schema, read_columns
+from charts import concurrency_figure, experiments_table, figure_json, plotly_chart, rollout_figure
+from figure_cache import FigureCache
+from metrics import Metrics, export as export_metrics
+from snapshots import SnapshotStore
 
 st.set_page_config(layout="wide")
 
@@ -23,59 +21,54 @@ st.set_page_config(layout="wide")
 # data1 = conn.read(worksheet="Experiments")
 # data2 = conn.read(worksheet="Weekly")
 
-# Function to fetch Google Sheets data dynamically
-@st.cache_data(ttl=1)  
-
-def load_data(sheet_name):
-    creds_dict = st.secrets["connections"]["gsheets"]  #Ensure correct access
-
-    creds_info = {
-        "type": creds_dict["type"],
-        "project_id": creds_dict["project_id"],
-        "private_key_id": creds_dict["private_key_id"],
-        "private_key": creds_dict["private_key"].replace('\\n', '\n'),
-        "client_email": creds_dict["client_email"],
-        "client_id": creds_dict["client_id"],
-        "auth_uri": creds_dict["auth_uri"],
-        "token_uri": creds_dict["token_uri"],
-        "auth_provider_x509_cert_url": creds_dict["auth_provider_x509_cert_url"],
-        "client_x509_cert_url": creds_dict["client_x509_cert_url"]
-    }
-
-    #Authenticate
-    creds = Credentials.from_service_account_info(creds_info, scopes=["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"])
-    client = gspread.authorize(creds)
-
-    #Open spreadsheet and worksheet
-    sheet = client.open_by_url(creds_dict["spreadsheet"])
-    worksheet = sheet.worksheet(sheet_name)
-
-    #Read raw data
-    raw_data = worksheet.get_all_values()
-
-    #Extract headers from the first row
-    headers = raw_data[0]  # First row is assumed to be headers
-
-    #Ensure headers are unique (append `_1, _2` to duplicates)
-    seen = {}
-    unique_headers = []
-    for col in headers:
-        if col in seen:
-            seen[col] += 1
-            unique_headers.append(f"{col}_{seen[col]}")
-        else:
-            seen[col] = 0
-            unique_headers.append(col)
-
-    #Convert the data into a DataFrame
-    df = pd.DataFrame(raw_data[1:], columns=unique_headers)  # Exclude first row (headers)
-
-    return df
-
-
-# Load and fetch data from Google Sheets
-data1 = load_data(sheet_name="Experiments")
-data2 = load_data(sheet_name="Weekly")
+# One authorized client and spreadsheet handle, shared by every rerun and session
+@st.cache_resource
+def get_sheets():
+    return SheetsResource(st.secrets["connections"]["gsheets"])  #Ensure correct access
+
+# Fetches only the columns the dashboard uses, and only the new rows of append-only sheets
+@st.cache_resource
+def get_sheet_reader():
+    return ColumnReader(read_columns, append_only=settings.APPEND_ONLY_SHEETS)
+
+# Last good copy of the worksheets, refetched only when the spreadsheet revision changes
+# and saved to disk so a restart (or offline mode) can render without the Sheets API.
+# With nothing saved yet, Weekly downloads in the background while the Experiments section renders.
+# The get_* functions below take snapshot.version as their key: what they return is built
+# once per data version and shared by every session without a copy, so it is only ever read
+@st.cache_resource
+def get_data_cache():
+    resource = None if settings.OFFLINE else get_sheets()
+    return SheetCache(resource, ("Experiments", "Weekly"), check_interval=settings.REVISION_CHECK_INTERVAL,
+                      store=SnapshotStore(settings.SNAPSHOT_DIR, tag=f"schema{SCHEMA_VERSION}"),
+                      offline=settings.OFFLINE, prepare=apply_schema, fetch=get_sheet_reader().fetch,
+                      deferred=("Weekly",))
+
+# Stage timings and counters of every session, for the debug panel and the metrics file
+@st.cache_resource
+def get_metrics():
+    return Metrics()
+
+metrics = get_metrics()
+metrics.inc("reruns")
+rerun_started = time.perf_counter()
+run_timings = []  # (stage, seconds) of this rerun
+
+def span(stage):
+    return metrics.span(stage, run_timings)
+
+# Records the time from the start of the rerun to this point as `stage`
+def mark(stage):
+    seconds = time.perf_counter() - rerun_started
+    metrics.observe(stage, seconds)
+    run_timings.append((stage, seconds))
+
+
+# Load and fetch data from Google Sheets (stale-while-revalidate, never blocks once warm)
+data_cache = get_data_cache()
+with span("load"):
+    snapshot = data_cache.get()
+data1 = snapshot.frames["Experiments"]
 
 st.markdown("""
     <style>
@@ -85,18 +78,71 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Refresh button
+# Refresh button, only re-checks the revision instead of clearing every cache
 if st.button("Refresh Data"):
-    st.cache_data.clear()
+    data_cache.revalidate()
     st.experimental_rerun()
 
-#just feed it in directly, no need for pd.read_csv()
-exp_view = data1
-
-exp_view.dropna(axis=0, how='all', inplace=True)
-
-# Drop columns where all cells are NaN
-exp_view.dropna(axis=1, how='all', inplace=True)
+#Showing which version of the sheet is on screen and how old it is
+def format_age(timestamp):
+    seconds = int(time.time() - timestamp)
+    return f"{seconds // 60} min {seconds % 60} s" if seconds >= 60 else f"{seconds} s"
+
+st.caption(f"Data version: {snapshot.version} · loaded {format_age(snapshot.fetched_at)} ago · checked {format_age(data_cache.checked_at)} ago")
+
+#Cleaning the experiments and adding the derived columns, also keyed on the day for DAYS REMAINING.
+#Filters select row positions in it instead of copying rows
+@st.cache_resource(max_entries=4)
+def get_exp_view(version, day, _data):
+    with span("prepare_experiments"):
+        return prepare_experiments(_data, datetime.today())
+
+exp_view = get_exp_view(snapshot.version, datetime.today().date(), data1)
+
+# Rendered figures of recent views, keyed by filters; a new data version (or day, for
+# DAYS REMAINING) drops them all
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(int(settings.FIGURE_CACHE_MB * 2 ** 20))
+
+figure_cache = get_figure_cache()
+figure_version = (snapshot.version, datetime.today().date())
+
+# Each section's figure is built only when its own widgets changed, returns (JSON, served from cache).
+# The session keeps its last figure per section outside the shared cache, so a rerun from another
+# section's widget doesn't rebuild this one even when the budget is 0 or the view was evicted
+def cached_figure(key, build):
+    last_key = f"last_figure_{key[0]}"
+    last = st.session_state.get(last_key)
+    if last is not None and last[0] == (figure_version, key):
+        return last[1], True
+    spec = figure_cache.get(figure_version, key)
+    cached = spec is not None
+    if not cached:
+        with span(f"{key[0]}_figure"):
+            fig = build()
+        with span("serialization"):
+            spec = figure_cache.put(figure_version, key, figure_json(fig))
+    st.session_state[last_key] = ((figure_version, key), spec)
+    return spec, cached
+
+#Showing how long each section took in this run and whether it was rebuilt
+def section_timing(name, started, cached):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{name}: {'served from cache' if cached else 'rebuilt'} in {elapsed_ms:.0f} ms")
+
+#Row positions per filter value and the START DATE order, so a filter change never scans exp_view
+@st.cache_resource(max_entries=2)
+def get_filter_index(version, _exp_view):
+    with span("filter_index"):
+        return FilterIndex(_exp_view)
+
+#Experiment counts per city, metric, initiative, stage, sub domain, year and month,
+#counted by precompute.py when the snapshot comes from it
+@st.cache_resource(max_entries=2)
+def get_cube(version, _exp_view):
+    with span("experiment_cube"):
+        return ExperimentCube(_exp_view, cells=snapshot.frames.get("Cube"))
 
 
 st.markdown("""
@@ -184,75 +230,17 @@ st.markdown("""
 
 
 
-#creating a function to calulate the remainings days left in an experiment
-def rem_days(row):
-    if row[9] == "Running":
-        return (row[7] - datetime.today()).days
-    else:
-        return "None"
-
-#converting the data types of date columns
-exp_view["START DATE"] = pd.to_datetime(exp_view["START DATE"])
-exp_view["END DATE"] = pd.to_datetime(exp_view["END DATE"])
-
-#creating a year column
-exp_view["YEAR"] = exp_view["START DATE"].dt.year
-
-#creating a duration column
-exp_view["DURATION"] = (exp_view["END DATE"] - exp_view["START DATE"]).dt.days
-
-#creating the days remaining column
-exp_view["DAYS REMAINING"] = exp_view.apply(rem_days, axis = 1)
-
-
-stage_order = ["Running", "Completed", "Paused"]
-exp_view['Sorting_Order'] = exp_view['STAGE'].apply(lambda x: stage_order.index(x))
-exp_view = exp_view.sort_values(by='Sorting_Order').drop(columns=['Sorting_Order'])
-
-
-
 #creating the graph
 
-# Define a function to set cell background color based on the "STAGE" value
-def get_fill_color(stage):
-    if stage == "Completed":
-        return 'rgb(4,76,60)'
-    elif stage == "Running":
-        return 'rgb(87,74,217)'  # Pastel blue
-    elif stage == "Paused":
-        return 'rgba(235,79,107,255)'  # Pastel yellow
-    else:
-        return 'black'  # Default color
-
-#############
-# YEAR EXPERIMNT SPLIT GRAPH
-
-# getting the year and the month
-exp_view["YEAR"] = exp_view["START DATE"].dt.year
-exp_view["MONTH"] = exp_view["START DATE"].dt.month
-
-#Building the horizontal graph for the year split
-grouped_df = exp_view.groupby(["YEAR", "MONTH"]).size().reset_index(name = "Counts")
-
-#creating a montn name that has the names of the month
-grouped_df['MONTH NAME'] = grouped_df['MONTH'].apply(lambda x: calendar.month_name[x])
-
-# Sort the DataFrame based on 'Month' to ensure the bars are in calendar order.
-grouped_df.sort_values('MONTH', inplace=True)
-
-# Prepare the data by concatenating 2022 and 2023 data with an additional categorical variable
-# that indicates the year and month for the y-axis labels.
-concatenated_df = pd.concat([
-    grouped_df[grouped_df["YEAR"].astype(str) == "2022"].assign(YearMonth=lambda x: x["YEAR"].astype(str) + ' - ' + x["MONTH NAME"].str[:3]),
-    grouped_df[grouped_df["YEAR"].astype(str) == "2023"].assign(YearMonth=lambda x: x["YEAR"].astype(str) + ' - ' + x["MONTH NAME"].str[:3]),
-    grouped_df[grouped_df["YEAR"].astype(str) == "2024"].assign(YearMonth=lambda x: x["YEAR"].astype(str) + ' - ' + x["MONTH NAME"].str[:3]),
-    grouped_df[grouped_df["YEAR"].astype(str) == "2025"].assign(YearMonth=lambda x: x["YEAR"].astype(str) + ' - ' + x["MONTH NAME"].str[:3])
-])
-
+#Selectbox options per filter with 'All' at the beginning
+@st.cache_resource(max_entries=2)
+def get_filter_options(version, _exp_view):
+    return {dim: ['All'] + _exp_view[dim].unique().tolist() for dim in FILTER_DIMENSIONS}
 
+filter_options = get_filter_options(snapshot.version, exp_view)
 
 # Create a list of unique city options with 'All' at the beginning
-city_options = ['All'] + exp_view['CITY'].unique().tolist()
+city_options = filter_options['CITY']
 
 # Find the index of 'Dubai' in the city options list
 default_city_index = city_options.index('Dubai') if 'Dubai' in city_options else 0
@@ -262,447 +250,431 @@ col1, col2, col3, col4 = st.columns(4)
 
 with col1:
     city_filter = st.selectbox('City', city_options)
-    metric_filter = st.selectbox('Metric', ['All'] + exp_view['PRIMARY METRIC'].unique().tolist())
+    metric_filter = st.selectbox('Metric', filter_options['PRIMARY METRIC'])
 
 with col2:
-    initiative_filter = st.selectbox('Initiative', ['All'] + exp_view['INITIATIVE'].unique().tolist())
-    year_filter = st.selectbox('Year', ['All'] + exp_view['YEAR'].unique().tolist())
+    initiative_filter = st.selectbox('Initiative', filter_options['INITIATIVE'])
+    year_filter = st.selectbox('Year', filter_options['YEAR'])
     
 with col3:
-    stage_filter = st.selectbox('Stage', ['All'] + exp_view['STAGE'].unique().tolist())
+    stage_filter = st.selectbox('Stage', filter_options['STAGE'])
     start_date_filter = st.date_input('Start Date',exp_view['START DATE'].min())
 
 with col4:
-    sub_domain_filter = st.selectbox('Sub Domain', ['All'] + exp_view['SUB DOMAIN'].unique().tolist())
+    sub_domain_filter = st.selectbox('Sub Domain', filter_options['SUB DOMAIN'])
     end_date_filter = st.date_input('End Date', exp_view['START DATE'].max())
 
-# Filter the DataFrame
-filtered_exp_view = exp_view.copy()
+# Filter the DataFrame through the shared per-version index, one take instead of a scan per filter
+experiment_filters = {
+    "CITY": city_filter,
+    "PRIMARY METRIC": metric_filter,
+    "INITIATIVE": initiative_filter,
+    "STAGE": stage_filter,
+    "SUB DOMAIN": sub_domain_filter,
+    "YEAR": year_filter,
+}
+experiments_started = time.perf_counter()
+filter_index = get_filter_index(snapshot.version, exp_view)
+with span("filtering"):
+    filtered_rows = filter_index.positions(experiment_filters, start_date_filter, end_date_filter)
+######
 
+# Table controls, sorting and paging happen on row positions so only the visible page is built and sent
+page_sizes = sorted({25, 50, 100, 250, settings.TABLE_PAGE_SIZE} - {0}) + ['All']
+col5, col6, col7, col8 = st.columns(4)
 
-if city_filter != 'All':
-    filtered_exp_view = filtered_exp_view[filtered_exp_view['CITY'] == city_filter]
+with col5:
+    sort_column = st.selectbox('Sort by', TABLE_SORT_COLUMNS)
 
-if metric_filter != 'All':
-    filtered_exp_view = filtered_exp_view[filtered_exp_view['PRIMARY METRIC'] == metric_filter]    
+with col6:
+    sort_descending = st.checkbox('Descending')
+
+with col7:
+    page_size = st.selectbox('Rows per page', page_sizes, index=page_sizes.index(settings.TABLE_PAGE_SIZE or 'All'))
+    page_size = None if page_size == 'All' else page_size
+
+with col8:
+    # The widget starts again at page 1 whenever the number of pages changes
+    table_page_number = st.number_input('Page', min_value=1, max_value=page_count(len(filtered_rows), page_size or len(filtered_rows) or 1), value=1, step=1)
+
+if len(filtered_rows):
+    first_row = 0 if page_size is None else (table_page_number - 1) * page_size
+    last_row = len(filtered_rows) if page_size is None else min(first_row + page_size, len(filtered_rows))
+    st.caption(f"Rows {first_row + 1}–{last_row} of {len(filtered_rows)}")
+
+#KPI counts, pie inputs and the year/month sunburst of one filter state, kept when only the
+#table's sorting or page changes
+@st.cache_data(max_entries=64)
+def get_experiment_summary(version, filters, start, end, _exp_view, _rows):
+    with span("summary"):
+        # Counting from the per-version cube, or from the filtered rows when the dates cut through a month
+        cube_cells = get_cube(version, _exp_view).slice(dict(filters), start, end)
+        if cube_cells is None:
+            cube_cells = count_cells(_exp_view.take(_rows))
+        return summarize_cells(cube_cells)
+
+# Everything drawn in fig1: KPI tiles, pies, sunburst and the current table page.
+# Only runs when no session has built this exact view yet, see cached_figure
+def build_experiments_figure():
+    page_rows = table_page(exp_view, filtered_rows, sort_column, sort_descending, table_page_number, page_size)
+
+    experiment_summary = get_experiment_summary(snapshot.version, tuple(experiment_filters.items()), start_date_filter,
+                                                end_date_filter, exp_view, filtered_rows)
+
+    #############
+    #SUB DOMAIN SPLIT GRAPH
+
+    sub_df = experiment_summary["sub_domains"]
+
+    #############
+    # METRIC SPLIT GRAPH
+    metric_df = experiment_summary["metrics"]
+
+    #############
+    # YEAR EXPERIMNT SPLIT GRAPH
+
+    #Year → month hierarchy for the sunburst, every year in the data with one id per month
+    year_months = experiment_summary["year_months"]
+
+
+    # #changing the date format
+    # exp_view["START DATE"] = pd.to_datetime(exp_view["START DATE"])
+    # exp_view["END DATE"] = pd.to_datetime(exp_view["END DATE"])
+
+    # Create the table with custom formatting, bold and colours are set per column instead of per cell
+    table = experiments_table(exp_view.take(page_rows))
+
+
+    # trace1_2=go.Scatter(
+    #     x=[38],
+    #     y=[2],
+    #     xaxis='x1',
+    #     yaxis='y1',
+    #     mode="text",
+    #     name="Markers and Text",
+    #     text=[str(len(filtered_exp_view)) + "          <br>Total Experiments"],
+    #     textposition="bottom left",
+    #     hoverinfo='skip',
+    #     textfont=dict(
+    #         size=20,
+    #         family="PT Sans Narrow",
+    #         color='rgb(4,76,60)'
+    #     )
+    # )
+
+
+    trace1=go.Scatter(
+        x=[1],
+        y=[2],
+        xaxis='x1',
+        yaxis='y1',
+        mode="text",
+        name="Markers and Text",
+        textposition="bottom center",
+        hoverinfo='skip',
+        textfont=dict(
+            size=15,
+            family="PT Sans Narrow",
+            color='rgb(4,76,60)'
+        )
+    )
 
-if initiative_filter != 'All':
-    filtered_exp_view = filtered_exp_view[filtered_exp_view['INITIATIVE'] == initiative_filter]
 
-if stage_filter != 'All':
-    filtered_exp_view = filtered_exp_view[filtered_exp_view['STAGE'] == stage_filter]
+    trace2=go.Pie(
+        labels=sub_df["SUB DOMAIN"], values=sub_df["Count"],
+        marker=dict(line=dict(color='#000000', width=2)), 
+        textinfo='none',
+        hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
+        domain=dict(x=[0.76, 1], y=[0.6, 0.9]))
+
+    trace2_2=go.Scatter(
+        x=[1],
+        y=[2],
+        xaxis='x2',
+        yaxis='y2',
+        mode="text",
+        name="Markers and Text",
+        textposition="bottom center",
+        hoverinfo='skip',
+        textfont=dict(
+            size=30,
+            family="PT Sans Narrow",
+            color='rgb(4,76,60)'
+        )
+    )
 
-if sub_domain_filter != 'All':
-    filtered_exp_view = filtered_exp_view[filtered_exp_view['SUB DOMAIN'] == sub_domain_filter]
+    trace3=go.Pie(
+        labels=metric_df["PRIMARY METRIC"], values=metric_df["Count"],
+        marker=dict(line=dict(color='#000000', width=2)), 
+        textinfo='none',
+        hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
+        domain=dict(x=[0.53, 0.72], y=[0.075, 0.395])
+        )
+
+    trace3_2=go.Scatter(
+        x=[1],
+        y=[2],
+        xaxis='x3',
+        yaxis='y3',
+        mode="text",
+        name="Markers and Text",
+        textposition="bottom center",
+        hoverinfo='skip',
+        textfont=dict(
+            size=30,
+            family="PT Sans Narrow",
+            color='rgb(4,76,60)'
+        )
+    )
 
-if year_filter != 'All':
-    filtered_exp_view = filtered_exp_view[filtered_exp_view['YEAR'] == year_filter]
+    # trace4=go.Bar(
+    #     xaxis='x4',
+    #     yaxis='y4',
+    #     y=concatenated_df["YearMonth"],
+    #     x=concatenated_df["Counts"],
+    #     orientation='h',
+    #     hovertemplate='<b>%{label}</b><br>Count: %{value}<extra></extra>',
+    #     marker=dict(
+    #         color=['rgba(87, 74, 216, 0.6)'] * len(concatenated_df["Counts"]),  # This will set a single color for all bars
+    #         line=dict(color=bar_colors_line, width=3)
+    #     )
+    # )
+
+
+
+
+
+
+    # trace4=go.Sunburst(
+    #     labels=concatenated_df["MONTH NAME"].tolist() + concatenated_df["YEAR"].unique().tolist(),  # Months as outer labels, Years as inner labels
+    #     parents=concatenated_df["YEAR"].tolist() + ["" for _ in concatenated_df["YEAR"].unique()],  # Months mapped to their respective years
+    #     values=concatenated_df["Counts"].tolist() + [concatenated_df[concatenated_df["YEAR"] == year]["Counts"].sum() for year in concatenated_df["YEAR"].unique()],  # Experiment counts
+    #     branchvalues="total",  # Values define the total sum per branch
+    #     hovertemplate="<b>%{label}</b><br>Experiments: %{value}<extra></extra>",
+    #     domain=dict(x=[0.76, 1], y=[0.075, 0.395])
+    # )
+
+
+    # trace4=go.Sunburst(
+    #     labels=concatenated_df["YearMonth"].tolist() + concatenated_df["YEAR"].astype(str).unique().tolist(),  # Labels for sunburst
+    #     parents=concatenated_df["YEAR"].astype(str).tolist() + ["" for _ in concatenated_df["YEAR"].astype(str).unique()],  # Year as parent, top-level root node
+    #     values=concatenated_df["Counts"].tolist() + [concatenated_df[concatenated_df["YEAR"] == year]["Counts"].sum() for year in concatenated_df["YEAR"].unique()],  # Experiment counts
+    #     branchvalues="total",  # Values define the total sum per branch
+    #     hovertemplate="<b>%{label}</b><br>Experiments: %{value}<extra></extra>",
+    #     textinfo="label",
+    #     domain=dict(x=[0.76, 1], y=[0.075, 0.395])
+    # )
+
+    trace4=go.Sunburst(
+        ids=year_months["ids"],  # Years, then "<year>-<month>" so months of different years never collide
+        labels=year_months["labels"],  # Years (inner) + month abbreviations (outer)
+        parents=year_months["parents"],  # Mapping: Months → Years, Years → Root
+        values=year_months["values"],  # Experiment counts, the year totals summed from its months
+        branchvalues="total",  # Ensures correct hierarchy
+        hovertemplate="<b>%{label} %{parent}</b><br>Experiments: %{value}<extra></extra>",  # Month and its year
+        textinfo="label",  # Labels will be visible only on hover
+        marker=dict(
+            line=dict(color='black', width=1.5)),
+        domain=dict(x=[0.76, 1], y=[0.075, 0.395])
+    )
 
-filtered_exp_view = filtered_exp_view[(filtered_exp_view['START DATE'] >= pd.Timestamp(start_date_filter)) & (filtered_exp_view['START DATE'] <= pd.Timestamp(end_date_filter))]
-######
 
-#############
-#SUB DOMAIN SPLIT GRAPH
-
-sub_df = pd.DataFrame(filtered_exp_view["SUB DOMAIN"].value_counts()).reset_index()
-sub_df.columns = ["SUB DOMAIN", "Count"]
-
-#############
-# METRIC SPLIT GRAPH
-metric_df = pd.DataFrame(filtered_exp_view["PRIMARY METRIC"].value_counts()).reset_index()
-metric_df.columns = ["PRIMARY METRIC", "Count"]
-
-
-# #changing the date format
-# exp_view["START DATE"] = pd.to_datetime(exp_view["START DATE"])
-# exp_view["END DATE"] = pd.to_datetime(exp_view["END DATE"])
-
-filtered_exp_view["END DATE"] = filtered_exp_view["END DATE"].dt.strftime("%Y-%m-%d")
-filtered_exp_view["START DATE"] = filtered_exp_view["START DATE"].dt.strftime("%Y-%m-%d")
-
-# Create a list of fill colors based on the "STAGE" column
-cell_colors = [get_fill_color(stage) for stage in filtered_exp_view["STAGE"]]
-
-#formating all the cells, so that all the cell text can is bold
-filtered_exp_view = filtered_exp_view.applymap(lambda x: f'<b>{x}</b>')
-
-#Creating a function that will add the experiment document links to the initiative column
-#There is no link, because in the new sheet that I created I didn't link the exp. docs to the sheet
-def create_hyperlink(row):
-    link = str(row["Experiment Doc Link"])
-    link = link.replace("<b>", "")
-    link = link.replace("</b>","")
-    initiative_name = row["INITIATIVE"]
-    return f'<a href="{link}">{initiative_name}</a>'
-
-# Assuming you have a 'Link' column containing the URLs
-filtered_exp_view["INITIATIVE"] = filtered_exp_view.apply(create_hyperlink, axis=1)
-
-# Create the table with custom formatting
-table = go.Table(
-    domain=dict(x=[0, 0.495],
-                y=[0, 1.0]),
-    header=dict(values=["<b>INITIATIVE</b>", "<b>CITY</b>", "<b>STAGE</b>", "<b>SUB DOMAIN</b>", "<b>START DATE</b>", "<b>END DATE</b>","<b>DURATION</b>", "<b>DAYS REMAINING</b>"],
-                fill_color='rgb(4,76,60)',
-                align='center',
-                font=dict(color='rgb(19,230,143)', size=14, family='PT Sans Narrow'),
-                line_color='rgb(19,230,143)', line_width=2),
-    cells=dict(values=[filtered_exp_view["INITIATIVE"], filtered_exp_view["CITY"], filtered_exp_view["STAGE"], filtered_exp_view["SUB DOMAIN"], filtered_exp_view["START DATE"], filtered_exp_view["END DATE"],filtered_exp_view["DURATION"],filtered_exp_view["DAYS REMAINING"]],
-               fill_color=[['lavender' if cell_color == 'white' else cell_color for cell_color in cell_colors]],
-               align='center',
-               line_color='rgb(19,230,143)', line_width=2),
-               cells_font=dict(color='white', size=13, family='PT Sans Narrow'),
-               )
-
-
-# trace1_2=go.Scatter(
-#     x=[38],
-#     y=[2],
-#     xaxis='x1',
-#     yaxis='y1',
-#     mode="text",
-#     name="Markers and Text",
-#     text=[str(len(filtered_exp_view)) + "          <br>Total Experiments"],
-#     textposition="bottom left",
-#     hoverinfo='skip',
-#     textfont=dict(
-#         size=20,
-#         family="PT Sans Narrow",
-#         color='rgb(4,76,60)'
-#     )
-# )
 
 
-trace1=go.Scatter(
-    x=[1],
-    y=[2],
-    xaxis='x1',
-    yaxis='y1',
-    mode="text",
-    name="Markers and Text",
-    textposition="bottom center",
-    hoverinfo='skip',
-    textfont=dict(
-        size=15,
-        family="PT Sans Narrow",
-        color='rgb(4,76,60)'
-    )
-)
-
-
-trace2=go.Pie(
-    labels=sub_df["SUB DOMAIN"], values=sub_df["Count"],
-    marker=dict(line=dict(color='#000000', width=2)), 
-    textinfo='none',
-    hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
-    domain=dict(x=[0.76, 1], y=[0.6, 0.9]))
-
-trace2_2=go.Scatter(
-    x=[1],
-    y=[2],
-    xaxis='x2',
-    yaxis='y2',
-    mode="text",
-    name="Markers and Text",
-    textposition="bottom center",
-    hoverinfo='skip',
-    textfont=dict(
-        size=30,
-        family="PT Sans Narrow",
-        color='rgb(4,76,60)'
-    )
-)
-
-trace3=go.Pie(
-    labels=metric_df["PRIMARY METRIC"], values=metric_df["Count"],
-    marker=dict(line=dict(color='#000000', width=2)), 
-    textinfo='none',
-    hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
-    domain=dict(x=[0.53, 0.72], y=[0.075, 0.395])
-    )
 
-trace3_2=go.Scatter(
-    x=[1],
-    y=[2],
-    xaxis='x3',
-    yaxis='y3',
-    mode="text",
-    name="Markers and Text",
-    textposition="bottom center",
-    hoverinfo='skip',
-    textfont=dict(
-        size=30,
-        family="PT Sans Narrow",
-        color='rgb(4,76,60)'
+    trace4_2=go.Scatter(
+        x=[1],
+        y=[2],
+        xaxis='x4',
+        yaxis='y4',
+        mode="text",
+        name="Markers and Text",
+        textposition="bottom center",
+        hoverinfo='skip',
+        textfont=dict(
+            size=30,
+            family="PT Sans Narrow",
+            color='rgb(4,76,60)'
+        )
     )
-)
-
-# Create a list for bar colors with the default color for all bars
-bar_colors_main = ['rgba(87, 74, 216, 0.6)'] * len(concatenated_df["Counts"])
-
-# Change the color of the last bar to a different color, e.g., red
-bar_colors_main[0] = 'rgb(19,230,143)'  # Red with transparency for the last bar
-
-# Create a list for bar colors with the default color for all bars
-bar_colors_line = ['rgba(87, 74, 216, 1.0)'] * len(concatenated_df["Counts"])
-
-# Change the color of the last bar to a different color, e.g., red
-bar_colors_line[0] = 'rgb(19,230,143)'  # Red with transparency for the last bar
-
-# trace4=go.Bar(
-#     xaxis='x4',
-#     yaxis='y4',
-#     y=concatenated_df["YearMonth"],
-#     x=concatenated_df["Counts"],
-#     orientation='h',
-#     hovertemplate='<b>%{label}</b><br>Count: %{value}<extra></extra>',
-#     marker=dict(
-#         color=bar_colors_main,  # This will set a single color for all bars
-#         line=dict(color=bar_colors_line, width=3)
-#     )
-# )
 
-# Ensure YEAR is stored as a string
-concatenated_df["YEAR"] = concatenated_df["YEAR"].astype(str)
 
 
 
+    layout1 = dict(
+        width=1267,
+        height=600,
+        autosize=False,
+        margin = dict(t=10),
+        showlegend=False,
+        xaxis1=dict(domain=[0.513, 0.743], showticklabels=False,  showgrid=False),
+        xaxis2=dict(domain=[0.766, 1], showticklabels=False,  showgrid=False),
+        xaxis3=dict(domain=[0.513, 0.743], showticklabels=False,  showgrid=False),
+        xaxis4=dict(domain=[0.766, 1], showticklabels=False, showgrid=False), #was 0.766
 
+        yaxis1=dict(domain=[0.55, 0.99], showticklabels=False,  showgrid=False),
+        yaxis2=dict(domain=[0.55, 0.99], showticklabels=False,  showgrid=False),
+        yaxis3=dict(domain=[0, 0.495], showticklabels=False, showgrid=False),
+        yaxis4=dict(domain=[0, 0.495], showticklabels=False, showgrid=False), #was 0.495
+        plot_bgcolor='rgb(19,230,143)'
 
+    )
 
-# trace4=go.Sunburst(
-#     labels=concatenated_df["MONTH NAME"].tolist() + concatenated_df["YEAR"].unique().tolist(),  # Months as outer labels, Years as inner labels
-#     parents=concatenated_df["YEAR"].tolist() + ["" for _ in concatenated_df["YEAR"].unique()],  # Months mapped to their respective years
-#     values=concatenated_df["Counts"].tolist() + [concatenated_df[concatenated_df["YEAR"] == year]["Counts"].sum() for year in concatenated_df["YEAR"].unique()],  # Experiment counts
-#     branchvalues="total",  # Values define the total sum per branch
-#     hovertemplate="<b>%{label}</b><br>Experiments: %{value}<extra></extra>",
-#     domain=dict(x=[0.76, 1], y=[0.075, 0.395])
-# )
+    fig1 = Figure(data=[table, trace1, trace2, trace2_2, trace3, trace3_2, trace4, trace4_2], layout=layout1)
 
+    fig1.update_layout(margin=dict(b=0))
 
-# trace4=go.Sunburst(
-#     labels=concatenated_df["YearMonth"].tolist() + concatenated_df["YEAR"].astype(str).unique().tolist(),  # Labels for sunburst
-#     parents=concatenated_df["YEAR"].astype(str).tolist() + ["" for _ in concatenated_df["YEAR"].astype(str).unique()],  # Year as parent, top-level root node
-#     values=concatenated_df["Counts"].tolist() + [concatenated_df[concatenated_df["YEAR"] == year]["Counts"].sum() for year in concatenated_df["YEAR"].unique()],  # Experiment counts
-#     branchvalues="total",  # Values define the total sum per branch
-#     hovertemplate="<b>%{label}</b><br>Experiments: %{value}<extra></extra>",
-#     textinfo="label",
-#     domain=dict(x=[0.76, 1], y=[0.075, 0.395])
-# )
 
-concatenated_df["YEAR"] = concatenated_df["YEAR"].astype(str)
-
-#Convert full month names to 3-letter abbreviations
-month_abbreviations = {
-    "January": "Jan", "February": "Feb", "March": "Mar", "April": "Apr", "May": "May", "June": "Jun",
-    "July": "Jul", "August": "Aug", "September": "Sep", "October": "Oct", "November": "Nov", "December": "Dec"
-}
-concatenated_df["MONTH NAME"] = concatenated_df["MONTH NAME"].map(month_abbreviations)
-
-#Add a unique prefix to each month based on its year
-prefix_map = {"2022": "~", "2023": "+", "2024": "*"}
-concatenated_df["Unique Month"] = concatenated_df["YEAR"].map(prefix_map) + concatenated_df["MONTH NAME"]  # Add prefix
-
-trace4=go.Sunburst(
-    labels=concatenated_df["Unique Month"].tolist() + concatenated_df["YEAR"].unique().tolist(),  # Unique Months (outer) + Years (inner)
-    parents=concatenated_df["YEAR"].tolist() + ["" for _ in concatenated_df["YEAR"].unique()],  # Mapping: Months → Years, Years → Root
-    values=concatenated_df["Counts"].tolist() + [concatenated_df[concatenated_df["YEAR"] == year]["Counts"].sum() for year in concatenated_df["YEAR"].unique()],  # Experiment counts
-    branchvalues="total",  # Ensures correct hierarchy
-    hovertemplate="<b>%{label}</b><br>Experiments: %{value}<extra></extra>",  # Tooltip displays correct info
-    textinfo="label",  # Labels will be visible only on hover
-    marker=dict(
-        line=dict(color='black', width=1.5)),
-    domain=dict(x=[0.76, 1], y=[0.075, 0.395])
-)
-
-
-
-
-
-trace4_2=go.Scatter(
-    x=[1],
-    y=[2],
-    xaxis='x4',
-    yaxis='y4',
-    mode="text",
-    name="Markers and Text",
-    textposition="bottom center",
-    hoverinfo='skip',
-    textfont=dict(
-        size=30,
-        family="PT Sans Narrow",
-        color='rgb(4,76,60)'
-    )
-)
-
-
-
-
-layout1 = dict(
-    width=1267,
-    height=600,
-    autosize=False,
-    margin = dict(t=10),
-    showlegend=False,
-    xaxis1=dict(domain=[0.513, 0.743], showticklabels=False,  showgrid=False),
-    xaxis2=dict(domain=[0.766, 1], showticklabels=False,  showgrid=False),
-    xaxis3=dict(domain=[0.513, 0.743], showticklabels=False,  showgrid=False),
-    xaxis4=dict(domain=[0.766, 1], showticklabels=False, showgrid=False), #was 0.766
-
-    yaxis1=dict(domain=[0.55, 0.99], showticklabels=False,  showgrid=False),
-    yaxis2=dict(domain=[0.55, 0.99], showticklabels=False,  showgrid=False),
-    yaxis3=dict(domain=[0, 0.495], showticklabels=False, showgrid=False),
-    yaxis4=dict(domain=[0, 0.495], showticklabels=False, showgrid=False), #was 0.495
-    plot_bgcolor='rgb(19,230,143)'
-
-)
-
-fig1 = Figure(data=[table, trace1, trace2, trace2_2, trace3, trace3_2, trace4, trace4_2], layout=layout1)
-
-fig1.update_layout(margin=dict(b=0))
-
-
-#Total Experiments
-fig1.add_annotation(
-    x=1,
-    y=4,
-    text="<b>" + str(len(filtered_exp_view)) + "<br>                   Total Experiments                   </b>",
-    showarrow=False,
-    bordercolor='rgb(4,76,60)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=19.5,
-        family="PT Sans Narrow",
-        color='rgb(19,230,143)'
+    #Total Experiments
+    fig1.add_annotation(
+        x=1,
+        y=4,
+        text="<b>" + str(experiment_summary["total"]) + "<br>                   Total Experiments                   </b>",
+        showarrow=False,
+        bordercolor='rgb(4,76,60)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=19.5,
+            family="PT Sans Narrow",
+            color='rgb(19,230,143)'
+        )
     )
-)
-
-#Running Experiments
-fig1.add_annotation(
-    x=1,
-    y=3.35,
-    text="<b>" + str(len(filtered_exp_view[filtered_exp_view["STAGE"] == "<b>Running</b>"])) + "<br>                Running Experiments                </b>",
-    showarrow=False,
-    bordercolor='rgba(87, 74, 216, 1.0)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(87, 74, 216, 0.8)',  # Background color of the box
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=19.5,
-        family="PT Sans Narrow",
-        color='white'
+
+    #Running Experiments
+    fig1.add_annotation(
+        x=1,
+        y=3.35,
+        text="<b>" + str(experiment_summary["stages"]["Running"]) + "<br>                Running Experiments                </b>",
+        showarrow=False,
+        bordercolor='rgba(87, 74, 216, 1.0)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(87, 74, 216, 0.8)',  # Background color of the box
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=19.5,
+            family="PT Sans Narrow",
+            color='white'
+        )
     )
-)
-
-#Completed Experiments
-fig1.add_annotation(
-    x=1,
-    y=2.7,
-    text="<b>" + str(len(filtered_exp_view[filtered_exp_view["STAGE"] == "<b>Completed</b>"])) + "<br>              Completed Experiments              </b>",
-    showarrow=False,
-    bordercolor='rgb(4,76,60)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=19.5,
-        family="PT Sans Narrow",
-        color='white'
+
+    #Completed Experiments
+    fig1.add_annotation(
+        x=1,
+        y=2.7,
+        text="<b>" + str(experiment_summary["stages"]["Completed"]) + "<br>              Completed Experiments              </b>",
+        showarrow=False,
+        bordercolor='rgb(4,76,60)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=19.5,
+            family="PT Sans Narrow",
+            color='white'
+        )
     )
-)
-
-#Paused Experiments
-fig1.add_annotation(
-    x=1,
-    y=2.05,
-    text="<b>" + str(len(filtered_exp_view[filtered_exp_view["STAGE"] == "<b>Paused</b>"])) + "<br>                 Paused Experiments                 </b>",
-    showarrow=False,
-    bordercolor='rgba(235,79,107,1.0)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(235,79,107,0.8)',  # Background color of the box
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=19.5,
-        family="PT Sans Narrow",
-        color='white'
+
+    #Paused Experiments
+    fig1.add_annotation(
+        x=1,
+        y=2.05,
+        text="<b>" + str(experiment_summary["stages"]["Paused"]) + "<br>                 Paused Experiments                 </b>",
+        showarrow=False,
+        bordercolor='rgba(235,79,107,1.0)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(235,79,107,0.8)',  # Background color of the box
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=19.5,
+            family="PT Sans Narrow",
+            color='white'
+        )
     )
-)
-
-#Year Split Title
-fig1.add_annotation(
-    x=0,
-    y=15,
-    text="<b>                        Yearly Experiment Split                        </b>",
-    showarrow=False,
-    bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
-    xref='x4',  # Reference to the fourth x-axis
-    yref='y4',
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=15,
-        family="PT Sans Narrow",
-        color='rgb(19,230,143)'
+
+    #Year Split Title
+    fig1.add_annotation(
+        x=0,
+        y=15,
+        text="<b>                        Yearly Experiment Split                        </b>",
+        showarrow=False,
+        bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
+        xref='x4',  # Reference to the fourth x-axis
+        yref='y4',
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=15,
+            family="PT Sans Narrow",
+            color='rgb(19,230,143)'
+        )
     )
-)
-
-#Sub Domain Split Title
-fig1.add_annotation(
-    x=0.5,
-    y=15,
-    text="<b>                   Sub Domain Experiment Split                   </b>",
-    showarrow=False,
-    bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
-    xref='x2',  # Reference to the fourth x-axis
-    yref='y2',
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=15,
-        family="PT Sans Narrow",
-        color='rgb(19,230,143)'
+
+    #Sub Domain Split Title
+    fig1.add_annotation(
+        x=0.5,
+        y=15,
+        text="<b>                   Sub Domain Experiment Split                   </b>",
+        showarrow=False,
+        bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
+        xref='x2',  # Reference to the fourth x-axis
+        yref='y2',
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=15,
+            family="PT Sans Narrow",
+            color='rgb(19,230,143)'
+        )
     )
-)
-
-#Metric Split Title
-fig1.add_annotation(
-    x=19.5,
-    y=15,
-    text="<b>                          Metric Experiment Split                       </b>",
-    showarrow=False,
-    bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
-    borderwidth=3,               # Width of the border
-    borderpad=4,                 # Padding between the text and the border
-    bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
-    xref='x3',  # Reference to the fourth x-axis
-    yref='y3',
-    # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
-    # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
-    font=dict(
-        size=15,
-        family="PT Sans Narrow",
-        color='rgb(19,230,143)'
+
+    #Metric Split Title
+    fig1.add_annotation(
+        x=19.5,
+        y=15,
+        text="<b>                          Metric Experiment Split                       </b>",
+        showarrow=False,
+        bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
+        borderwidth=3,               # Width of the border
+        borderpad=4,                 # Padding between the text and the border
+        bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
+        xref='x3',  # Reference to the fourth x-axis
+        yref='y3',
+        # xanchor='left',  # Use 'left', 'center', or 'right' for horizontal alignment
+        # yanchor='bottom',  # Use 'top', 'middle', or 'bottom' for vertical alignment
+        font=dict(
+            size=15,
+            family="PT Sans Narrow",
+            color='rgb(19,230,143)'
+        )
     )
-)
 
+    return fig1
 
-st.plotly_chart(fig1)
+
+# Keyed on the Experiments widgets only, so changing a rollout filter serves fig1 from the cache
+fig1_key = ("experiments", tuple(experiment_filters.values()), start_date_filter, end_date_filter,
+            sort_column, sort_descending, table_page_number, page_size)
+fig1_json, fig1_cached = cached_figure(fig1_key, build_experiments_figure)
+plotly_chart(fig1_json)
+section_timing("Experiments", experiments_started, fig1_cached)
+# First meaningful paint: the title, filters, KPI tiles and fig1 are on screen
+mark("first_paint")
 
 st.markdown("""
 <style>
@@ -721,6 +693,39 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+#### CONCURRENT EXPERIMENTS
+st.markdown('<p class="header2-font">Concurrent Experiments</p>', unsafe_allow_html=True)
+concurrency_started = time.perf_counter()
+
+#Start and end events of every experiment sorted by day, a filter change only picks the rows' events
+@st.cache_resource(max_entries=2)
+def get_concurrency(version, _exp_view):
+    with span("concurrency_sweep"):
+        return ConcurrencySweep(_exp_view)
+
+concurrency_splits = {'None': None, 'City': 'CITY', 'Sub Domain': 'SUB DOMAIN'}
+concurrency_freqs = {'Daily': 'D', 'Weekly (peak)': 'W'}
+col9, col10, col11, col12 = st.columns(4)
+
+with col9:
+    concurrency_split = st.selectbox('Split by', list(concurrency_splits))
+
+with col10:
+    concurrency_freq = st.selectbox('Granularity', list(concurrency_freqs))
+
+def build_concurrency_figure():
+    # Same rows as the Experiments section, so its filters apply here too
+    series = get_concurrency(snapshot.version, exp_view).series(filtered_rows, concurrency_splits[concurrency_split],
+                                                               concurrency_freqs[concurrency_freq])
+    return concurrency_figure(series)
+
+# Keyed on the Experiments filters and this panel's widgets
+fig3_key = ("concurrency", tuple(experiment_filters.values()), start_date_filter, end_date_filter,
+            concurrency_split, concurrency_freq)
+fig3_json, fig3_cached = cached_figure(fig3_key, build_concurrency_figure)
+plotly_chart(fig3_json, use_container_width=True)
+section_timing("Concurrent Experiments", concurrency_started, fig3_cached)
+
 
 st.markdown('<p class="header2-font">Rollouts</p>', unsafe_allow_html=True)
 
@@ -733,36 +738,33 @@ st.markdown("""
 
 
 #### BI WEEKLY PLOT
-
-#bi-weekly view sheet
-weekly_data = data2
-
-weekly_data.dropna(axis=0, how='all', inplace=True)
-
-# Drop columns where all cells are NaN
-weekly_data.dropna(axis=1, how='all', inplace=True)
-
-
-#Filling in all "INITIATIVE" column with each rows' respective Initiative
-# weekly_data["INITIATIVE"] = weekly_data["INITIATIVE"].fillna(method='ffill')
-# weekly_data["INITIATIVE"] = weekly_data["INITIATIVE"].astype(str).replace("nan", None).fillna(method='ffill')
-weekly_data["INITIATIVE"] = weekly_data["INITIATIVE"].replace("", pd.NA).fillna(method='ffill')
-# weekly_data["INITIATIVE"] = weekly_data["INITIATIVE"].replace("", pd.NA).fillna(method='ffill')
-
-
-
-
-#Get rid of the 4th column because we don't need it
-weekly_data = weekly_data.drop(weekly_data.columns[3], axis=1)
+rollouts_started = time.perf_counter()
+
+# On a cold start the Weekly sheet may still be downloading, everything above is already drawn
+weekly_placeholder = st.empty()
+if "Weekly" not in snapshot.frames:
+    weekly_placeholder.info("Loading the Weekly sheet…")
+with span("load_weekly"):
+    snapshot = data_cache.complete(snapshot)
+weekly_placeholder.empty()
+data2 = snapshot.frames["Weekly"]
+
+#bi-weekly view sheet without the owner column ("INITIATIVE" is already filled down by the Weekly schema)
+@st.cache_resource(max_entries=2)
+def get_weekly_data(version, _data):
+    with span("prepare_weekly"):
+        return prepare_weekly(_data)
+
+weekly_data = get_weekly_data(snapshot.version, data2)
+
+#Every rollout interval with its city and initiative, which the Rollouts selectboxes filter
+@st.cache_resource(max_entries=2)
+def get_rollouts(version, _weekly_data):
+    with span("transform_data"):
+        return RolloutTable(_weekly_data, intervals=snapshot.frames.get("Rollouts"))
 
 col5, col6, col7, col8 = st.columns(4)
 
-# Get all the unique cities
-city_options = ['All'] + list(weekly_data['CITY'].unique())
-
-# Set the default index for 'Dubai'
-default_index = city_options.index('Dubai') if 'Dubai' in city_options else 0
-
 # st.write("Columns in Weekly Data:", weekly_data.columns)
 
 
@@ -772,13 +774,14 @@ default_index = city_options.index('Dubai') if 'Dubai' in city_options else 0
 ########
 
 # Function to get filtered options for initiatives based on selected city
-def get_filtered_initiatives(selected_city, data):
+@st.cache_data(max_entries=64)
+def get_filtered_initiatives(version, selected_city, _data):
     if selected_city == 'All':
         # If 'All' cities are selected, return all unique initiatives without 'All'
-        return sorted(data['INITIATIVE'].unique().tolist())
+        return sorted(_data['INITIATIVE'].unique().tolist())
     else:
         # If a specific city is selected, return 'All' plus the initiatives for that city
-        return ['All'] + sorted(data[data['CITY'] == selected_city]['INITIATIVE'].unique().tolist())
+        return ['All'] + sorted(_data[_data['CITY'] == selected_city]['INITIATIVE'].unique().tolist())
 
 # Define the city options
 city_options = ['All'] + sorted(weekly_data['CITY'].unique().tolist())
@@ -790,209 +793,43 @@ with col5:
 # Initialize the selectbox for initiatives with filtered options based on the selected city
 with col6:
     # Get filtered initiatives based on the selected city
-    filtered_initiative_options = get_filtered_initiatives(city_filter_2, weekly_data)
+    filtered_initiative_options = get_filtered_initiatives(snapshot.version, city_filter_2, weekly_data)
     initiative_filter_2 = st.selectbox('Initiative', filtered_initiative_options)
 
-# Now, apply the filters to the DataFrame
-filtered_weekly_view = weekly_data.copy()
-
-if city_filter_2 != 'All':
-    filtered_weekly_view = filtered_weekly_view[filtered_weekly_view['CITY'] == city_filter_2]
-
-if initiative_filter_2 != 'All':
-    filtered_weekly_view = filtered_weekly_view[filtered_weekly_view['INITIATIVE'] == initiative_filter_2]
-
 ###########
 
 st.markdown('<style>div.row-widget.stRadio > div{flex-direction:row;}</style>', unsafe_allow_html=True)
 
 
-#Function to transform the data
-def parse_week_dates(header_str):
-    dates_str = header_str.split('\n')[-1]
-    start_date, end_date = dates_str.split(' to ')
-    return start_date, end_date
-
-def transform_data(headers, row_data):
-    # Extract dates from the headers skipping the first three headers as they are not dates
-    headers_dates = [parse_week_dates(h) for h in headers[3:] if 'WEEK' in h]
-
-    transformed_rows = []
-    current_stage = None
-    current_start_date = None
-    
-    # Loop through the row_data starting from the 4th element
-    for i, stage in enumerate(row_data[3:], start=3):  # Start from 3 (index) to skip the first four columns
-        if pd.isna(stage) and current_stage is not None:
-            # Since we skip the first three elements, index should be i - 3
-            transformed_rows.append({
-                'Initiative-city-platform': str(row_data[0]) + '-' + str(row_data[1]) + '-' + str(row_data[2]), # Concatenate the first three columns
-                'stage': current_stage,
-                'start': current_start_date,
-                'finish': headers_dates[i-3-1][1]  # i-3 to account for skipped columns, additional -1 for previous date
-            })
-            current_stage = None
-        elif not pd.isna(stage):
-            if current_stage is not None and current_stage != stage:
-                transformed_rows.append({
-                    'Initiative-city-platform': str(row_data[0]) + '-' + str(row_data[1]) + '-' + str(row_data[2]),
-                    'stage': current_stage,
-                    'start': current_start_date,
-                    'finish': headers_dates[i-3-1][1]
-                })
-            if current_stage != stage:
-                current_start_date = headers_dates[i-3][0]  # i-3 to account for the skipped columns
-            current_stage = stage
-            
-    if current_stage is not None:
-        transformed_rows.append({
-            'Initiative-city-platform': row_data[0] + '-' + row_data[1] + '-' + row_data[2],
-            'stage': current_stage,
-            'start': current_start_date,
-            'finish': headers_dates[-1][1]
-        })
-    
-    return transformed_rows
-
-
-
-# The rest of your code should remain the same.
-headers = list(filtered_weekly_view.columns)
-
-
-data_as_list = filtered_weekly_view.values.tolist()
-
-# Now, you can iterate over this list and use your transform_data function
-transformed_data = []
-for row in data_as_list:
-    transformed_rows = transform_data(headers, row)
-    transformed_data.extend(transformed_rows)
-######
-
-#Putting the data in a dataframe
-transformed_df = pd.DataFrame(transformed_data)
-
-#Converring the empty strongs with nan values so empty timeslines dont appear on the Gannt Chart
-transformed_df.replace("", np.nan, inplace=True)
-
-#Calculating the height of the graph
-height_number = max(len(transformed_df["Initiative-city-platform"].unique()), 1) * 30
-
-
-#making sure it doesnt go below 300 height to prevent wierd lookig plots
-height_number = max(height_number, 300) 
-
-
-# Find the earliest date in the 'start' column
-transformed_df['start'] = pd.to_datetime(transformed_df['start'])
-
-earliest_date = transformed_df['start'].min()
-
-# Calculate one month before the earliest date
-one_month_before = earliest_date - relativedelta(months=3)
-
-
-#graphing the data
-
-#Graphingh the data in a Gantt chart
-color_map = {
-    'In Experiment': 'rgba(255, 255, 0, 0.8)',
-    'Awaiting Results': 'rgba(87, 74, 217, 0.8)',
-    'Rollout': 'rgba(0, 165, 44, 0.8)',
-    'No Rollout': 'rgba(235,79,107,0.8)',
-    'Paused': 'rgba(122, 123, 127, 0.8)'
-}
-
-#sorting the dataframe, because this will affect the lower code snippet when I come to creating the y-tick labels
-transformed_df = transformed_df.sort_values(by='start')
-
-
-fig2 = px.timeline(transformed_df, x_start="start", x_end="finish", y="Initiative-city-platform", color="stage",
-                 color_discrete_map=color_map)
-
-
-#get rid of the title
-fig2.update_layout(title="")
-
-#add borders to the gantt chart
-fig2.update_traces(marker_line_color='black', marker_line_width=2)
-
-fig2.update_layout(showlegend=False)
-# fig2.update_traces(width=1)
-fig2.update_yaxes(visible=False, showticklabels=False)
-
-# Set the background color of the graph
-fig2.update_layout(plot_bgcolor='rgb(19,230,143)')  # Or any other color you prefer
+def build_rollouts_figure():
+    # Now, apply the filters to the precomputed intervals (already typed and sorted by start)
+    transformed_df = get_rollouts(snapshot.version, weekly_data).select(city_filter_2, initiative_filter_2)
 
-# Change the font of the tick labels on both axes and make the font bold
-fig2.update_xaxes(tickfont=dict(family='PT Sans Narrow', size=12, color='white'))
-fig2.update_yaxes(tickfont=dict(family='PT Sans Narrow', size=12, color='white'))
+    #Graphing the data in a Gantt chart, with all the y labels drawn in one batch
+    return rollout_figure(transformed_df, label_mode=settings.GANTT_LABEL_MODE)
 
-# Make the graph itself taller, we can make the height based on a number and times the pixel
-fig2.update_layout(height=height_number)  # Or any other height you prefer
-
-# Hide the legend if not needed
-fig2.update_layout(showlegend=False)
-
-fig2.update_layout(
-    margin = dict(t=5)
-)
-
-
-# fig2.add_shape(
-#     type="rect",
-#     x0=-0.5,  # Adjust these coordinates to cover the area behind the y-axis
-#     y0=-0.5,
-#     x1=0,
-#     y1=1,
-#     xref="paper",
-#     yref="paper",
-#     fillcolor="rgb(19,230,143)",  # Set the rectangle color
-#     layer="below",
-#     line_width=0,
-# )
-
-
-
-# Set the x-axis to start one month before the earliest date
-fig2.update_xaxes(range=[one_month_before, transformed_df['finish'].max()])
-
-
-#Getting the order of the ylabel ticks
-
-all_y_categories = []
-for trace in fig2.data:
-    all_y_categories.extend(trace.y)
-
-# Remove duplicates while preserving order
-unique_y_categories_ordered = list(OrderedDict.fromkeys(all_y_categories))
-
-
-for i, label in enumerate(unique_y_categories_ordered):
-    fig2.add_annotation(
-        x=0.005,  # Adjust this value to move the annotation left or right
-        y=i,
-        text=label,
-        showarrow=False,
-        bordercolor='rgba(4,76,60, 1.0)',  # Color of the border
-        borderwidth=3,               # Width of the border
-        borderpad=1,                 # Padding between the text and the border
-        bgcolor='rgba(4,76,60, 0.8)',  # Background color of the box
-        xref="paper",
-        yref="y",
-        align="right",
-        xanchor="left",
-        yanchor="middle",
-        font=dict(family='PT Sans Narrow',size=12, color='rgb(19,230,143)')
-    )
+# Keyed on the Rollouts widgets only, so changing an experiment filter serves fig2 from the cache
+fig2_json, fig2_cached = cached_figure(("rollouts", city_filter_2, initiative_filter_2), build_rollouts_figure)
+plotly_chart(fig2_json, use_container_width=True)
+section_timing("Rollouts", rollouts_started, fig2_cached)
 
-# You would need to hide the original y-axis labels
-fig2.update_yaxes(showticklabels=False)
-fig2.update_xaxes(tickfont=dict(size=20)) 
+#### METRICS
 
+mark("rerun")
+metric_sources = {"sheet_cache": data_cache.stats(), "figure_cache": figure_cache.stats()}
+if data_cache.resource is not None:
+    metric_sources["sheets"] = data_cache.resource.stats()
+    metric_sources["sheet_reader"] = get_sheet_reader().stats()
 
+# Where this rerun spent its time, plus the totals since the server started
+if settings.DEBUG_PANEL or st.experimental_get_query_params().get("debug") == ["1"]:
+    with st.expander("Debug", expanded=True):
+        st.dataframe(pd.DataFrame([(stage, round(seconds * 1000, 1)) for stage, seconds in run_timings], columns=["Stage", "ms"]),
+                     hide_index=True)
+        st.json({**metric_sources, **metrics.stats()}, expanded=False)
 
-st.plotly_chart(fig2, use_container_width=True)
+if settings.METRICS_FILE:
+    export_metrics(settings.METRICS_FILE, metrics, metric_sources, run_timings)
 
 
 
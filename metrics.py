@@ -0,0 +1,118 @@
+"""Stage timings and counters of the dashboard, for the debug panel and a local scraper."""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "dashboard"
+
+
+class Metrics:
+    """Process-wide counters and stage timings, shared by every session.
+
+    Counters only go up. Every stage keeps how often it ran and its total seconds,
+    exported like a Prometheus summary without quantiles. `span(stage, run)` also
+    appends `(stage, seconds)` to `run`, the list of the current rerun.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.stage_counts = {}
+        self.stage_seconds = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.stage_counts[stage] = self.stage_counts.get(stage, 0) + 1
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0) + seconds
+
+    @contextmanager
+    def span(self, stage, run=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe(stage, seconds)
+            if run is not None:
+                run.append((stage, seconds))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "stages": {stage: {"count": self.stage_counts[stage], "seconds": self.stage_seconds[stage]}
+                           for stage in self.stage_counts},
+            }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def prometheus_text(metrics, sources):
+    """Prometheus text format of `metrics` plus the numeric values of each source's stats().
+
+    `sources` is {name: stats dict}, e.g. the figure cache's; a nested dict becomes one
+    series per key under a `key` label. Source values are exported as gauges.
+    """
+    stats = metrics.stats()
+    lines = [f"# TYPE {PREFIX}_stage_seconds summary"]
+    for stage, timing in sorted(stats["stages"].items()):
+        lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{_label(stage)}"}} {timing["seconds"]:.6f}')
+        lines.append(f'{PREFIX}_stage_seconds_count{{stage="{_label(stage)}"}} {timing["count"]}')
+    for name, value in sorted(stats["counters"].items()):
+        lines += [f"# TYPE {PREFIX}_{name}_total counter", f"{PREFIX}_{name}_total {value}"]
+    for source, values in sources.items():
+        for key, value in values.items():
+            metric = f"{PREFIX}_{source}_{key}"
+            if isinstance(value, dict):
+                series = [(f'{metric}{{key="{_label(k)}"}}', v) for k, v in sorted(value.items()) if _number(v)]
+            else:
+                series = [(metric, value)] if _number(value) else []
+            if series:
+                lines.append(f"# TYPE {metric} gauge")
+                lines += [f"{name} {v}" for name, v in series]
+    return "\n".join(lines) + "\n"
+
+
+def json_line(metrics, sources, run=()):
+    #One JSON object per rerun: its own stage timings plus the running totals
+    record = {"time": round(time.time(), 3), "run": [[stage, round(seconds, 6)] for stage, seconds in run],
+              **metrics.stats(), "sources": sources}
+    return json.dumps(record, default=str) + "\n"
+
+
+def export(path, metrics, sources, run=()):
+    """Write the metrics for a local scraper, the format picked by the file extension.
+
+    `.prom` files are rewritten atomically in Prometheus text format (e.g. for the
+    node_exporter textfile collector); anything else gets one JSON line appended per call.
+    """
+    directory = os.path.dirname(path) or "."
+    try:
+        os.makedirs(directory, exist_ok=True)
+        if path.endswith(".prom"):
+            fd, tmp = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+            with os.fdopen(fd, "w") as f:
+                f.write(prometheus_text(metrics, sources))
+            os.replace(tmp, path)
+        else:
+            with open(path, "a") as f:
+                f.write(json_line(metrics, sources, run))
+    except OSError:
+        logger.warning("Could not write the metrics to %s", path, exc_info=True)
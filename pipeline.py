@@ -0,0 +1,425 @@
+"""Data preparation for the dashboard, kept free of Streamlit so it can be reused and benchmarked."""
+
+import calendar
+
+import numpy as np
+import pandas as pd
+
+# Order the experiments table is sorted in, unknown stages go last
+STAGE_ORDER = ["Running", "Completed", "Paused"]
+
+
+def stage_categories(stages):
+    #Known stages first in STAGE_ORDER, then anything else found in the sheet
+    extra = sorted(set(stages.dropna().unique()) - set(STAGE_ORDER))
+    return STAGE_ORDER + extra
+
+
+def prepare_experiments(data, now):
+    """Clean the Experiments sheet and add the derived columns in one vectorized pass.
+
+    Adds YEAR, DURATION, DAYS REMAINING (days until END DATE for running experiments,
+    "None" otherwise) and MONTH, turns STAGE into an ordered categorical and sorts by it.
+    """
+    exp_view = data.dropna(axis=0, how='all').dropna(axis=1, how='all')
+
+    start = pd.to_datetime(exp_view["START DATE"])
+    end = pd.to_datetime(exp_view["END DATE"])
+    stage = pd.Categorical(exp_view["STAGE"], categories=stage_categories(exp_view["STAGE"]), ordered=True)
+
+    days_left = (end - now).dt.days.astype("Int64")
+    running = exp_view["STAGE"].to_numpy() == "Running"
+
+    exp_view = exp_view.assign(**{
+        "START DATE": start,
+        "END DATE": end,
+        "STAGE": stage,
+        "YEAR": start.dt.year.astype("Int64"),
+        "DURATION": (end - start).dt.days.astype("Int64"),
+        "DAYS REMAINING": days_left.astype(object).where(running, "None"),
+        "MONTH": start.dt.month.astype("Int64"),
+    })
+
+    # Sorting on the categorical codes puts Running, Completed, Paused in that order
+    return exp_view.sort_values(by="STAGE")
+
+
+# Selectbox filters on the Experiments section, in the order they are applied
+FILTER_DIMENSIONS = ["CITY", "PRIMARY METRIC", "INITIATIVE", "STAGE", "SUB DOMAIN", "YEAR"]
+
+
+class FilterIndex:
+    """Row positions of exp_view per value of every filter dimension, plus START DATE order.
+
+    `positions` resolves any filter combination by intersecting the posting lists and
+    binary-searching the date range, instead of one full-column scan per filter.
+    """
+
+    def __init__(self, exp_view, dimensions=FILTER_DIMENSIONS, date_column="START DATE"):
+        self.size = len(exp_view)
+        self.postings = {
+            dim: exp_view.groupby(dim, sort=False, observed=True).indices
+            for dim in dimensions
+        }
+        dates = exp_view[date_column].to_numpy(dtype="datetime64[ns]")
+        # NaT sorts last so it never falls inside a range
+        self.date_order = np.argsort(dates, kind="stable")
+        self.sorted_dates = dates[self.date_order]
+
+    def date_range(self, start, end):
+        left = np.searchsorted(self.sorted_dates, pd.Timestamp(start).to_datetime64(), side="left")
+        right = np.searchsorted(self.sorted_dates, pd.Timestamp(end).to_datetime64(), side="right")
+        return np.sort(self.date_order[left:right])
+
+    def positions(self, filters, start=None, end=None):
+        """Sorted row positions matching every {dimension: value} filter and START DATE in [start, end].
+
+        Values equal to 'All' (or None) don't filter.
+        """
+        selected = []
+        for dim, value in filters.items():
+            if value is None or value == 'All':
+                continue
+            selected.append(self.postings[dim].get(value, np.empty(0, dtype=np.intp)))
+        if start is not None and end is not None:
+            selected.append(self.date_range(start, end))
+        if not selected:
+            return np.arange(self.size)
+
+        # Intersect from the smallest list up so every step stays small
+        selected.sort(key=len)
+        result = selected[0]
+        for rows in selected[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, rows, assume_unique=True)
+        return np.sort(result)
+
+
+# Columns the experiments table can be sorted on, STAGE (the stage order) is the default
+TABLE_SORT_COLUMNS = ["STAGE", "START DATE", "END DATE", "DURATION", "DAYS REMAINING", "INITIATIVE", "CITY", "SUB DOMAIN"]
+
+
+def page_count(rows, page_size):
+    return max(-(-rows // page_size), 1)
+
+
+def table_page(exp_view, positions, sort_by="STAGE", descending=False, page=1, page_size=None):
+    """Row positions of one page of the experiments table, sorted on sort_by.
+
+    Only the sort column of the filtered rows is read, so the table is built from the
+    visible page alone. exp_view is already in stage order, which makes the default
+    sort a plain slice of `positions`. page_size None returns every row.
+    """
+    if sort_by != "STAGE" or descending:
+        key = exp_view[sort_by].take(positions)
+        if sort_by == "DAYS REMAINING":
+            # "None" for experiments that aren't running, sorted last
+            key = pd.to_numeric(key, errors="coerce")
+        order = key.reset_index(drop=True).sort_values(ascending=not descending, kind="stable", na_position="last").index
+        positions = positions[order]
+    if page_size is None:
+        return positions
+    first = (page - 1) * page_size
+    return positions[first:first + page_size]
+
+
+# Finest grain of the experiment cube: every filter dimension plus the start month
+CUBE_DIMENSIONS = FILTER_DIMENSIONS + ["MONTH"]
+
+
+def count_cells(exp_view):
+    """Experiment counts per combination of CUBE_DIMENSIONS and MONTH START, one row per cell."""
+    keys = pd.DataFrame({
+        col: exp_view[col].cat.codes if isinstance(exp_view[col].dtype, pd.CategoricalDtype) else exp_view[col]
+        for col in CUBE_DIMENSIONS
+    })
+    keys["MONTH START"] = exp_view["START DATE"].dt.to_period("M").dt.to_timestamp()
+
+    # Grouping on category codes keeps the rows with blank dimensions (dropna=False is
+    # unreliable with categoricals), the codes are turned back into categories afterwards
+    cells = keys.groupby(list(keys.columns), dropna=False, sort=False).size().reset_index(name="Counts")
+    for col in CUBE_DIMENSIONS:
+        dtype = exp_view[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            cells[col] = pd.Categorical.from_codes(cells[col], dtype=dtype)
+    return cells
+
+
+class ExperimentCube:
+    """Experiment counts over city × metric × initiative × stage × sub domain × year × month.
+
+    `slice` answers a filter combination from the cube as long as the date range only
+    cuts at month boundaries (the default range spans the whole history), otherwise it
+    returns None and the caller counts rows.
+    `cells` are the counts of an earlier count_cells(exp_view), e.g. saved by precompute.py.
+    """
+
+    def __init__(self, exp_view, cells=None):
+        self.cells = count_cells(exp_view) if cells is None else cells
+        self.index = FilterIndex(self.cells, date_column="MONTH START")
+        self.first_date = exp_view["START DATE"].min()
+        self.last_date = exp_view["START DATE"].max()
+
+    def month_range(self, start, end):
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        if start > self.first_date and start.day != 1:
+            return None
+        if end < self.last_date and not end.is_month_end:
+            return None
+        return start.to_period("M").to_timestamp(), end.to_period("M").to_timestamp()
+
+    def slice(self, filters, start, end):
+        months = self.month_range(start, end)
+        if months is None:
+            return None
+        return self.cells.take(self.index.positions(filters, *months))
+
+
+def year_month_hierarchy(cells):
+    """ids, labels, parents and values of the year → month sunburst, for whatever years the cells span.
+
+    One groupby over the cells gives the months, the year totals are summed from those.
+    Month ids are "<year>-<month>" so the same month of two years never collides, the
+    labels are the month abbreviations. Years come first, months in calendar order.
+    """
+    months = cells.groupby(["YEAR", "MONTH"])["Counts"].sum()
+    years = months.groupby(level="YEAR").sum()
+    year_ids = [str(year) for year in years.index]
+    month_years = [str(year) for year in months.index.get_level_values("YEAR")]
+    month_numbers = months.index.get_level_values("MONTH")
+    return {
+        "ids": year_ids + [f"{year}-{month:02d}" for year, month in zip(month_years, month_numbers)],
+        "labels": year_ids + [calendar.month_abbr[month] for month in month_numbers],
+        "parents": [""] * len(years) + month_years,
+        "values": years.tolist() + months.tolist(),
+    }
+
+
+def summarize_cells(cells):
+    """KPI tile counts, pie inputs and the year → month hierarchy from a slice of cells."""
+    def counts_by(col, label):
+        counts = cells.groupby(col, observed=True)["Counts"].sum()
+        counts = counts[counts > 0].sort_values(ascending=False, kind="stable")
+        return counts.rename_axis(col).reset_index(name=label)
+
+    stages = cells.groupby("STAGE", observed=True)["Counts"].sum()
+    return {
+        "total": int(cells["Counts"].sum()),
+        "stages": {stage: int(stages.get(stage, 0)) for stage in STAGE_ORDER},
+        "sub_domains": counts_by("SUB DOMAIN", "Count"),
+        "metrics": counts_by("PRIMARY METRIC", "Count"),
+        "year_months": year_month_hierarchy(cells),
+    }
+
+
+# Dimensions the concurrency series can be split by, None for one total series
+CONCURRENCY_DIMENSIONS = ["CITY", "SUB DOMAIN"]
+BLANK_LABEL = "(blank)"
+
+
+class ConcurrencySweep:
+    """Experiments running at once on every day, by a sweep over the START/END DATE events.
+
+    Every experiment adds +1 on its START DATE and -1 on the day after its END DATE
+    (experiments without an END DATE never end), and the events are sorted by day
+    once. `series` keeps the events of the selected rows in that order, takes a
+    cumulative sum per group and reads it off at every day, so a filter combination
+    costs O(n) plus a binary search per day and group.
+    """
+
+    def __init__(self, exp_view, dimensions=CONCURRENCY_DIMENSIONS):
+        start = exp_view["START DATE"].to_numpy(dtype="datetime64[D]")
+        end = exp_view["END DATE"].to_numpy(dtype="datetime64[D]") + np.timedelta64(1, "D")
+        # An END DATE before the START DATE counts as a one-day experiment
+        end = np.where(end <= start, start + np.timedelta64(1, "D"), end)
+        rows = np.arange(len(exp_view))
+        has_start = ~np.isnat(start)
+        has_end = has_start & ~np.isnat(end)
+
+        times = np.concatenate([start[has_start], end[has_end]])
+        order = np.argsort(times, kind="stable")
+        self.size = len(exp_view)
+        self.times = times[order]
+        self.deltas = np.concatenate([np.ones(has_start.sum(), dtype=np.int64), -np.ones(has_end.sum(), dtype=np.int64)])[order]
+        self.rows = np.concatenate([rows[has_start], rows[has_end]])[order]
+        self.groups = {}
+        for dim in dimensions:
+            # '' and missing values are both blank, -1 after factorize
+            codes, labels = pd.factorize(exp_view[dim].astype(object).replace("", np.nan), sort=True)
+            self.groups[dim] = (codes, [str(label) for label in labels] + [BLANK_LABEL])
+
+    def series(self, positions, by=None, freq="D"):
+        """Running experiments per day (freq "D") or the peak of every week from Monday (freq "W").
+
+        Counts only the rows at `positions`, one column per value of `by` (or a single
+        "Experiments" column), columns ordered by their peak.
+        """
+        selected = np.zeros(self.size, dtype=bool)
+        selected[positions] = True
+        keep = selected[self.rows]
+        times, deltas, rows = self.times[keep], self.deltas[keep], self.rows[keep]
+        if not len(times):
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="DATE"))
+
+        days = np.arange(times[0], times[-1] + np.timedelta64(1, "D"))
+        if by is None:
+            codes, labels = np.zeros(len(rows), dtype=np.intp), ["Experiments"]
+        else:
+            codes, labels = self.groups[by]
+            codes = codes[rows]
+        columns = {}
+        for code in np.unique(codes):
+            in_group = codes == code
+            running = np.cumsum(deltas[in_group])
+            # Events up to and including each day, read off the running total
+            events = np.searchsorted(times[in_group], days, side="right")
+            columns[labels[code]] = np.where(events > 0, running[events - 1], 0)
+
+        frame = pd.DataFrame(columns, index=pd.DatetimeIndex(days, name="DATE"))
+        if freq == "W":
+            frame = frame.resample("W-MON", label="left", closed="left").max()
+        return frame[frame.max().sort_values(ascending=False, kind="stable").index]
+
+
+# Weekly sheet: INITIATIVE, CITY and platform come first, every other column is a week
+ROLLOUT_LABEL_COLUMNS = 3
+ROLLOUT_COLUMNS = ['Initiative-city-platform', 'stage', 'start', 'finish']
+
+
+def parse_week_headers(headers):
+    """Start and end date strings of every WEEK header, e.g. "WEEK 1\\n2024-01-01 to 2024-01-07"."""
+    weeks = pd.Series([h for h in headers if 'WEEK' in h], dtype=object)
+    if weeks.empty:
+        return np.empty(0, dtype=object), np.empty(0, dtype=object)
+    dates = weeks.str.split('\n').str[-1].str.split(' to ', expand=True)
+    return dates[0].to_numpy(dtype=object), dates[1].to_numpy(dtype=object)
+
+
+def rollout_intervals(weekly, extra_columns=()):
+    """One row per run of identical stage cells in the week grid, for the whole sheet at once.
+
+    Blank (NaN) cells end a run. The run from week a to week b becomes
+    (Initiative-city-platform, stage, start of week a, end of week b), followed by the
+    row's `extra_columns`.
+    """
+    headers = list(weekly.columns)
+    week_starts, week_ends = parse_week_headers(headers[ROLLOUT_LABEL_COLUMNS:])
+    grid = weekly.iloc[:, ROLLOUT_LABEL_COLUMNS:].to_numpy(dtype=object)
+    if grid.size == 0:
+        return pd.DataFrame(columns=ROLLOUT_COLUMNS + list(extra_columns))
+
+    # Stage codes per cell, -1 where the cell is blank
+    codes, stages = pd.factorize(grid.ravel())
+    codes = codes.reshape(grid.shape)
+    filled = codes >= 0
+
+    # A run starts where the code differs from the previous week and ends where it differs from the next
+    starts = filled.copy()
+    starts[:, 1:] &= codes[:, 1:] != codes[:, :-1]
+    ends = filled.copy()
+    ends[:, :-1] &= codes[:, :-1] != codes[:, 1:]
+
+    # Row-major nonzero keeps runs in row order, left to right, so starts and ends pair up
+    rows, first_week = np.nonzero(starts)
+    _, last_week = np.nonzero(ends)
+
+    labels = weekly.iloc[:, 0].astype(str)
+    for i in range(1, ROLLOUT_LABEL_COLUMNS):
+        labels = labels + '-' + weekly.iloc[:, i].astype(str)
+
+    # A run still open in the last column finishes with the last week header
+    finish = np.where(last_week == grid.shape[1] - 1, week_ends[-1], week_ends[np.minimum(last_week, len(week_ends) - 1)])
+    intervals = pd.DataFrame({
+        'Initiative-city-platform': labels.to_numpy(dtype=object)[rows],
+        'stage': stages[codes[rows, first_week]],
+        'start': week_starts[first_week],
+        'finish': finish,
+    }, columns=ROLLOUT_COLUMNS)
+    for col in extra_columns:
+        intervals[col] = weekly[col].array.take(rows)
+    return intervals
+
+
+def prepare_weekly(data):
+    #Drop the empty rows and columns, and the 4th column because we don't need it
+    weekly = data.dropna(axis=0, how='all').dropna(axis=1, how='all')
+    return weekly.drop(weekly.columns[3], axis=1)
+
+
+class RolloutTable:
+    """Every rollout interval of the Weekly sheet with its CITY and INITIATIVE, sorted by start.
+
+    A filter change only selects rows from it.
+    `intervals` is the `intervals` table of an earlier RolloutTable, e.g. saved by precompute.py.
+    """
+
+    def __init__(self, weekly, intervals=None):
+        if intervals is None:
+            intervals = rollout_intervals(weekly, extra_columns=["CITY", "INITIATIVE"])
+            # Empty stage cells become NaN so empty timelines don't appear on the Gantt chart
+            intervals["stage"] = intervals["stage"].replace("", np.nan)
+            intervals["start"] = pd.to_datetime(intervals["start"])
+            intervals = intervals.sort_values(by="start", kind="stable").reset_index(drop=True)
+        self.intervals = intervals
+        self.index = FilterIndex(self.intervals, dimensions=["CITY", "INITIATIVE"], date_column="start")
+
+    def select(self, city='All', initiative='All'):
+        return self.intervals.take(self.index.positions({"CITY": city, "INITIATIVE": initiative}))
+
+
+#Row-by-row reference for rollout_intervals, checked against it in tests/test_rollout_intervals.py and benchmarked
+def parse_week_dates(header_str):
+    dates_str = header_str.split('\n')[-1]
+    start_date, end_date = dates_str.split(' to ')
+    return start_date, end_date
+
+
+def transform_data(headers, row_data):
+    # Extract dates from the headers skipping the first three headers as they are not dates
+    headers_dates = [parse_week_dates(h) for h in headers[3:] if 'WEEK' in h]
+
+    transformed_rows = []
+    current_stage = None
+    current_start_date = None
+
+    # Loop through the row_data starting from the 4th element
+    for i, stage in enumerate(row_data[3:], start=3):  # Start from 3 (index) to skip the first four columns
+        if pd.isna(stage) and current_stage is not None:
+            # Since we skip the first three elements, index should be i - 3
+            transformed_rows.append({
+                'Initiative-city-platform': str(row_data[0]) + '-' + str(row_data[1]) + '-' + str(row_data[2]), # Concatenate the first three columns
+                'stage': current_stage,
+                'start': current_start_date,
+                'finish': headers_dates[i-3-1][1]  # i-3 to account for skipped columns, additional -1 for previous date
+            })
+            current_stage = None
+        elif not pd.isna(stage):
+            if current_stage is not None and current_stage != stage:
+                transformed_rows.append({
+                    'Initiative-city-platform': str(row_data[0]) + '-' + str(row_data[1]) + '-' + str(row_data[2]),
+                    'stage': current_stage,
+                    'start': current_start_date,
+                    'finish': headers_dates[i-3-1][1]
+                })
+            if current_stage != stage:
+                current_start_date = headers_dates[i-3][0]  # i-3 to account for the skipped columns
+            current_stage = stage
+
+    if current_stage is not None:
+        transformed_rows.append({
+            'Initiative-city-platform': str(row_data[0]) + '-' + str(row_data[1]) + '-' + str(row_data[2]),
+            'stage': current_stage,
+            'start': current_start_date,
+            'finish': headers_dates[-1][1]
+        })
+
+    return transformed_rows
+
+
+def rollout_intervals_rowwise(weekly):
+    headers = list(weekly.columns)
+    transformed_data = []
+    for row in weekly.values.tolist():
+        transformed_data.extend(transform_data(headers, row))
+    return pd.DataFrame(transformed_data, columns=ROLLOUT_COLUMNS)
@@ -0,0 +1,75 @@
+"""Headless worker that fetches the worksheets and saves every derived frame ahead of viewers.
+
+    python precompute.py [--once] [--interval 30] [--snapshot-dir .snapshots]
+
+Every new spreadsheet revision is typed, turned into rollout intervals and experiment
+counts, and saved as one snapshot (see snapshots.SnapshotStore) whose LATEST pointer is
+swapped atomically. Dashboards started with DASHBOARD_OFFLINE=1 on the same directory
+only read the newest snapshot: they never call the Sheets API and skip the derivations.
+Credentials are read from the same [connections.gsheets] secrets as the dashboard.
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime
+
+import streamlit as st
+
+import settings
+from pipeline import ExperimentCube, RolloutTable, prepare_experiments, prepare_weekly
+from schema import SCHEMA_VERSION, apply_schema, read_columns
+from sheets import ColumnReader, SheetCache, SheetsResource
+from snapshots import SnapshotStore
+
+logger = logging.getLogger("precompute")
+
+SHEET_NAMES = ("Experiments", "Weekly")
+
+
+def derive_frames(frames):
+    #Frames the dashboard would otherwise build once per data version, see get_rollouts and get_cube
+    exp_view = prepare_experiments(frames["Experiments"], datetime.today())
+    return {
+        "Rollouts": RolloutTable(prepare_weekly(frames["Weekly"])).intervals,
+        "Cube": ExperimentCube(exp_view).cells,
+    }
+
+
+def precompute_cache(resource, snapshot_dir, append_only=()):
+    #The dashboard's SheetCache plus the derived frames, under the same snapshot tag
+    store = SnapshotStore(snapshot_dir, tag=f"schema{SCHEMA_VERSION}")
+    reader = ColumnReader(read_columns, append_only=append_only)
+    return SheetCache(resource, SHEET_NAMES, store=store, prepare=apply_schema, derive=derive_frames, fetch=reader.fetch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="save the current version and exit")
+    parser.add_argument("--interval", type=float, default=settings.REVISION_CHECK_INTERVAL,
+                        help="seconds between checks of the spreadsheet revision")
+    parser.add_argument("--snapshot-dir", default=settings.SNAPSHOT_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    cache = precompute_cache(SheetsResource(st.secrets["connections"]["gsheets"]), args.snapshot_dir,
+                             settings.APPEND_ONLY_SHEETS)
+    version = None
+    while True:
+        try:
+            started = time.perf_counter()
+            snapshot = cache.revalidate()
+            if snapshot.version != version:
+                version = snapshot.version
+                logger.info("Saved version %s in %.1f s", version, time.perf_counter() - started)
+        except Exception:
+            if args.once:
+                raise
+            logger.exception("Precompute failed, retrying in %s s", args.interval)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Column types for the worksheets, applied once when a new version is loaded."""
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a schema changes so snapshots saved with the old one are not reused
+SCHEMA_VERSION = 1
+
+# Dates are entered as 2024-01-31 in the sheet, anything else falls back to inference
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class SheetSchema:
+    """Declared dtypes for one worksheet.
+
+    dates: {column: strftime format}, categories: dimension columns stored as category,
+    fill_down: columns whose blank cells take the value above them, category_match: every
+    column whose header contains this text is also a category (the Weekly stage grid).
+    read: the only columns fetched from the sheet (None fetches all of them),
+    skip_positions: column positions never fetched.
+    Columns left out of the fetch are kept in the frame as blanks.
+    """
+
+    def __init__(self, dates=None, categories=(), fill_down=(), category_match=None, read=None,
+                 skip_positions=()):
+        self.dates = dates or {}
+        self.categories = list(categories)
+        self.fill_down = list(fill_down)
+        self.category_match = category_match
+        self.read = None if read is None else list(read)
+        self.skip_positions = set(skip_positions)
+
+    def read_positions(self, headers):
+        #Positions of the columns to fetch, None when every column is needed
+        if self.read is None and not self.skip_positions:
+            return None
+        return [i for i, col in enumerate(headers)
+                if (self.read is None or col in self.read) and i not in self.skip_positions]
+
+    def missing_columns(self, headers):
+        #Columns of `read` and `skip_positions` the header row doesn't have, e.g. after a rename
+        missing = [col for col in self.read or () if col not in headers]
+        return missing + [f"column {i + 1}" for i in sorted(self.skip_positions) if i >= len(headers)]
+
+    def category_columns(self, frame):
+        matched = [col for col in frame.columns if self.category_match and self.category_match in col]
+        return [col for col in self.categories if col in frame.columns] + matched
+
+    def apply(self, frame):
+        frame = frame.copy()
+        for col in self.fill_down:
+            if col in frame.columns:
+                frame[col] = frame[col].replace("", pd.NA).fillna(method='ffill')
+        for col, date_format in self.dates.items():
+            if col in frame.columns:
+                frame[col] = parse_dates(frame[col], date_format)
+        for col in self.category_columns(frame):
+            frame[col] = frame[col].astype("category")
+        return frame
+
+
+def parse_dates(values, date_format):
+    #Parse with the declared format, only inferring the cells that don't match it
+    parsed = pd.to_datetime(values, format=date_format, errors="coerce")
+    unparsed = parsed.isna() & values.notna() & (values != "")
+    if unparsed.any():
+        logger.warning("%s: %d dates don't match %s, inferring them", values.name, unparsed.sum(), date_format)
+        parsed[unparsed] = pd.to_datetime(values[unparsed])
+    return parsed
+
+
+SCHEMAS = {
+    "Experiments": SheetSchema(
+        dates={"START DATE": DATE_FORMAT, "END DATE": DATE_FORMAT},
+        categories=["CITY", "STAGE", "SUB DOMAIN", "PRIMARY METRIC", "INITIATIVE"],
+        read=["INITIATIVE", "CITY", "PRIMARY METRIC", "SUB DOMAIN", "START DATE", "END DATE", "STAGE",
+              "Experiment Doc Link"],
+    ),
+    "Weekly": SheetSchema(
+        categories=["INITIATIVE", "CITY"],
+        fill_down=["INITIATIVE"],
+        category_match="WEEK",
+        # The 4th column (owner) is dropped by prepare_weekly
+        skip_positions=[3],
+    ),
+}
+
+
+def memory_footprint(raw, typed):
+    #Per-column bytes of the all-string frame against the typed one, see tools/schema_report.py
+    raw_bytes = raw.memory_usage(deep=True, index=False)
+    typed_bytes = typed.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "raw dtype": raw.dtypes.astype(str),
+        "raw bytes": raw_bytes,
+        "typed dtype": typed.dtypes.astype(str),
+        "typed bytes": typed_bytes,
+    })
+    report.loc["TOTAL"] = ["", raw_bytes.sum(), "", typed_bytes.sum()]
+    report["saved %"] = (100 * (1 - report["typed bytes"] / report["raw bytes"])).round(1)
+    return report
+
+
+def read_columns(sheet_name, headers):
+    #Column positions of a worksheet the dashboard uses, None to fetch them all
+    schema = SCHEMAS.get(sheet_name)
+    if schema is None:
+        return None
+    missing = schema.missing_columns(headers)
+    if missing:
+        logger.warning("%s: no %s in the header row, check the sheet against schema.py", sheet_name,
+                       ", ".join(map(repr, missing)))
+    return schema.read_positions(headers)
+
+
+def apply_schema(sheet_name, frame):
+    #Typed copy of a freshly fetched worksheet, unknown sheets are returned as they are
+    schema = SCHEMAS.get(sheet_name)
+    if schema is None:
+        return frame
+    typed = schema.apply(frame)
+    logger.info("%s: typed %d rows and %d columns", sheet_name, len(typed), len(typed.columns))
+    return typed
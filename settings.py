@@ -0,0 +1,30 @@
+"""Dashboard settings, each one overridable through an environment variable."""
+
+import os
+
+# Seconds between checks of the spreadsheet's Drive modifiedTime
+REVISION_CHECK_INTERVAL = float(os.environ.get("DASHBOARD_REVISION_CHECK_INTERVAL", 30))
+
+# Where every fetched version of the worksheets is saved as Feather files
+SNAPSHOT_DIR = os.environ.get("DASHBOARD_SNAPSHOT_DIR", ".snapshots")
+
+# Serve only the saved snapshots and never call the Sheets API
+OFFLINE = os.environ.get("DASHBOARD_OFFLINE", "").lower() in ("1", "true", "yes")
+
+# Gantt y labels: "annotations" (boxed), "text" (one text trace) or "auto" (boxed up to 300 rows)
+GANTT_LABEL_MODE = os.environ.get("DASHBOARD_GANTT_LABEL_MODE", "auto")
+
+# Rows per page of the experiments table, 0 shows every filtered row on one page
+TABLE_PAGE_SIZE = int(os.environ.get("DASHBOARD_TABLE_PAGE_SIZE", 50))
+
+# Memory budget of the shared cache of rendered figures, in MiB (0 disables it)
+FIGURE_CACHE_MB = float(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", 64))
+
+# Show the debug panel (stage timings, API calls, cache stats) below the charts; ?debug=1 also shows it
+DEBUG_PANEL = os.environ.get("DASHBOARD_DEBUG_PANEL", "").lower() in ("1", "true", "yes")
+
+# File the metrics are written to after every rerun: Prometheus text for *.prom, JSON lines otherwise
+METRICS_FILE = os.environ.get("DASHBOARD_METRICS_FILE", "")
+
+# Worksheets that only ever get rows appended (comma separated): after the first read only the new rows are fetched
+APPEND_ONLY_SHEETS = [name.strip() for name in os.environ.get("DASHBOARD_APPEND_ONLY_SHEETS", "").split(",") if name.strip()]
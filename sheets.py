@@ -0,0 +1,704 @@
+"""Google Sheets access shared by every session of the dashboard."""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import pandas as pd
+
+# gspread and google-auth are imported by the functions that call the API, so a start
+# from a saved snapshot (or offline mode) paints without loading them
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+# Refresh the access token this many seconds before it actually expires
+TOKEN_REFRESH_MARGIN = 300
+
+# Worksheets read concurrently when a single batch read is not possible
+FETCH_WORKERS = 4
+
+# API errors retried with backoff: over the per-minute quota (429) or briefly unavailable
+RETRY_STATUSES = (429, 500, 503)
+
+# Attempts per API call; the n-th retry waits a random 0..min(BACKOFF_MAX, BACKOFF_BASE * 2**n) seconds
+RETRY_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 32.0
+
+
+def credentials_info(creds_dict):
+    #Build the service account info from the [connections.gsheets] secrets
+    return {
+        "type": creds_dict["type"],
+        "project_id": creds_dict["project_id"],
+        "private_key_id": creds_dict["private_key_id"],
+        "private_key": creds_dict["private_key"].replace('\\n', '\n'),
+        "client_email": creds_dict["client_email"],
+        "client_id": creds_dict["client_id"],
+        "auth_uri": creds_dict["auth_uri"],
+        "token_uri": creds_dict["token_uri"],
+        "auth_provider_x509_cert_url": creds_dict["auth_provider_x509_cert_url"],
+        "client_x509_cert_url": creds_dict["client_x509_cert_url"]
+    }
+
+
+def connect(creds_dict):
+    #Authenticate against Google and return the client with the credentials it uses
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_info(credentials_info(creds_dict), scopes=SCOPES)
+    return gspread.authorize(creds), creds
+
+
+def error_status(error):
+    #HTTP status of a gspread APIError
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def retryable(error):
+    return error_status(error) in RETRY_STATUSES
+
+
+def exceeds_grid(error):
+    #HTTP 400 for a range starting below the last row of the sheet's grid
+    return error_status(error) == 400 and "exceeds grid limits" in str(error)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile wait for its result.
+
+    `coalesced` counts the callers that were served another caller's result (or error).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def run(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                future.set_result(func())
+            except BaseException as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return future.result()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def unique_headers(headers):
+    #Ensure headers are unique (append `_1, _2` to duplicates)
+    seen = {}
+    result = []
+    for col in headers:
+        if col in seen:
+            seen[col] += 1
+            result.append(f"{col}_{seen[col]}")
+        else:
+            seen[col] = 0
+            result.append(col)
+    return result
+
+
+def frame_from_values(raw_data):
+    #First row is assumed to be headers, the rest is data
+    headers = raw_data[0]
+    return pd.DataFrame(raw_data[1:], columns=unique_headers(headers))
+
+
+class SheetsResource:
+    """Holds one authorized client, the opened spreadsheet and its worksheet handles.
+
+    `connect` is called as `connect(creds_dict)` and must return `(client, credentials)`,
+    so a local fake client can stand in for gspread. API calls go through `call`, which
+    lets only one identical call be in flight, retries quota and availability errors with
+    jittered exponential backoff, and counts every attempt per method; the rows and bytes
+    of the values read are counted too. The lock only guards the cached handles and the
+    counters: connecting, token refreshes and API calls run outside it, so stats() never
+    waits behind a retry.
+    """
+
+    def __init__(self, creds_dict, connect=connect, refresh_margin=TOKEN_REFRESH_MARGIN, retry_attempts=RETRY_ATTEMPTS,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, sleep=time.sleep):
+        self.creds_dict = creds_dict
+        self._connect = connect
+        self.refresh_margin = refresh_margin
+        self.retry_attempts = retry_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self.flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._client = None
+        self._creds = None
+        self._spreadsheet = None
+        self._worksheets = {}
+        self.hits = 0
+        self.misses = 0
+        self.token_refreshes = 0
+        self.api_calls = {}
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.retries = 0
+        self.rate_limited = 0
+
+    def record_call(self, method):
+        with self._lock:
+            self.api_calls[method] = self.api_calls.get(method, 0) + 1
+
+    def record_values(self, values, size=None):
+        #values: the rows a call returned, sized as their JSON (close to the response body) unless given
+        size = len(json.dumps(values)) if size is None else size
+        with self._lock:
+            self.rows_fetched += len(values)
+            self.bytes_fetched += size
+
+    def call(self, method, func, key=None, retry=True):
+        #func() for API method `method`, shared with concurrent callers making the same (method, key) call.
+        # retry=False makes one plain attempt, for lookups inside another call that already retries
+        if not retry:
+            self.record_call(method)
+            return func()
+        return self.flights.run((method, key), lambda: self._call_with_retries(method, func))
+
+    def _call_with_retries(self, method, func):
+        from gspread.exceptions import APIError
+
+        for attempt in range(self.retry_attempts):
+            self.record_call(method)
+            try:
+                return func()
+            except APIError as error:
+                status = error_status(error)
+                if status == 429:
+                    with self._lock:
+                        self.rate_limited += 1
+                if not retryable(error) or attempt == self.retry_attempts - 1:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                with self._lock:
+                    self.retries += 1
+                logger.warning("%s failed with HTTP %s, retrying in %.1f s", method, status, delay)
+                self._sleep(delay)
+
+    def _token_expiring(self, creds):
+        expiry = getattr(creds, "expiry", None)
+        if expiry is None:
+            # Service account credentials start without a token
+            return not getattr(creds, "token", None)
+        # google-auth keeps expiry as a naive UTC datetime
+        return (expiry - datetime.utcnow()).total_seconds() < self.refresh_margin
+
+    def _open_client(self):
+        with self._lock:
+            if self._client is not None:
+                return self._client, self._creds
+        client, creds = self._connect(self.creds_dict)
+        with self._lock:
+            if self._client is None:
+                self._client, self._creds = client, creds
+            return self._client, self._creds
+
+    def _refresh_token(self, creds):
+        # A caller that finished just before may have refreshed it already
+        if not self._token_expiring(creds):
+            return
+        from google.auth.transport.requests import Request
+        creds.refresh(Request())
+        with self._lock:
+            self.token_refreshes += 1
+
+    def client(self):
+        with self._lock:
+            client, creds = self._client, self._creds
+        if client is None:
+            client, creds = self.flights.run(("connect", None), self._open_client)
+        if self._token_expiring(creds):
+            self.flights.run(("refresh_token", None), lambda: self._refresh_token(creds))
+        return client
+
+    def spreadsheet(self, retry=True):
+        client = self.client()
+        with self._lock:
+            spreadsheet = self._spreadsheet
+            if spreadsheet is not None:
+                self.hits += 1
+                return spreadsheet
+            self.misses += 1
+        # Concurrent misses share one open_by_url through `call`
+        spreadsheet = self.call("open_by_url", lambda: client.open_by_url(self.creds_dict["spreadsheet"]), retry=retry)
+        with self._lock:
+            if self._spreadsheet is None:
+                self._spreadsheet = spreadsheet
+            return self._spreadsheet
+
+    def worksheet(self, sheet_name, retry=True):
+        spreadsheet = self.spreadsheet(retry)
+        with self._lock:
+            worksheet = self._worksheets.get(sheet_name)
+        if worksheet is None:
+            # Looked up outside the lock so concurrent fetches don't queue behind each other
+            worksheet = self.call("worksheet", lambda: spreadsheet.worksheet(sheet_name), key=sheet_name, retry=retry)
+            with self._lock:
+                worksheet = self._worksheets.setdefault(sheet_name, worksheet)
+        return worksheet
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "token_refreshes": self.token_refreshes,
+                "worksheets": len(self._worksheets),
+                "api_calls": dict(self.api_calls),
+                "rows_fetched": self.rows_fetched,
+                "bytes_fetched": self.bytes_fetched,
+                "in_flight": self.flights.in_flight(),
+                "coalesced": self.flights.coalesced,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+            }
+
+
+def fetch_values_threaded(resource, sheet_names):
+    #One get_all_values() per worksheet, run side by side so the wait is the slowest sheet
+    def fetch(sheet_name):
+        def get_all_values():
+            # The lookups are retried with the read, not on their own as well
+            values = resource.worksheet(sheet_name, retry=False).get_all_values()
+            resource.record_values(values)
+            return values
+        return resource.call("get_all_values", get_all_values, key=sheet_name)
+
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(sheet_names))) as pool:
+        return dict(zip(sheet_names, pool.map(fetch, sheet_names)))
+
+
+def fetch_values(resource, sheet_names):
+    #Read every worksheet in one values_batch_get call, falling back to a thread pool
+    from gspread.exceptions import APIError
+    from gspread.utils import absolute_range_name, fill_gaps
+
+    sheet_names = list(sheet_names)
+    if not sheet_names:
+        return {}
+    spreadsheet = resource.spreadsheet()
+
+    def values_batch_get():
+        response = spreadsheet.values_batch_get([absolute_range_name(name) for name in sheet_names])
+        resource.record_values([row for value_range in response.get("valueRanges", []) for row in value_range.get("values", [])])
+        return response
+
+    try:
+        response = resource.call("values_batch_get", values_batch_get, key=tuple(sheet_names))
+    except APIError as error:
+        if retryable(error):
+            # Still over quota after the retries, a call per worksheet would only add to it
+            raise
+        return fetch_values_threaded(resource, sheet_names)
+
+    # The API trims empty trailing cells, pad rows the same way get_all_values() does
+    value_ranges = response.get("valueRanges", [])
+    return {name: fill_gaps(value_range.get("values", [[]])) for name, value_range in zip(sheet_names, value_ranges)}
+
+
+def column_letter(position):
+    #0-based column position to its A1 letters: 0 -> A, 26 -> AA
+    from gspread.utils import rowcol_to_a1
+
+    return rowcol_to_a1(1, position + 1).rstrip("0123456789")
+
+
+def column_runs(positions):
+    #Sorted column positions grouped into (first, last) runs of adjacent columns
+    runs = []
+    for position in sorted(positions):
+        if runs and position == runs[-1][1] + 1:
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+    return [tuple(run) for run in runs]
+
+
+class ColumnReader:
+    """Fetches only the columns the dashboard uses, and only new rows of append-only sheets.
+
+    The header rows of every sheet are read first in one call. `select(sheet_name,
+    headers)` returns the column positions to fetch (None for all of them), which are
+    then read as one A1 range per run of adjacent columns, all sheets in one call. Rows
+    keep the header width with '' in the columns left out, so frame_from_values gives
+    the columns of a full read up to the last non-blank header. Columns right of it are
+    not read at all, a full read keeps them when any of their cells is filled. For a
+    sheet in `append_only` whose header row is unchanged, only the last row held and
+    the rows below it are fetched. They are appended when new rows came in and the last
+    row held reads the same; otherwise (an edit in place, or deleted rows that shrank
+    the grid) the sheet is read in full. Every read logs its bytes against an estimate
+    for the full sheet.
+    """
+
+    def __init__(self, select, append_only=()):
+        self.select = select
+        self.append_only = set(append_only)
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.full_reads = 0
+        self.incremental_reads = 0
+        self.bytes_read = 0
+        self.bytes_full_estimate = 0
+
+    def fetch(self, resource, sheet_names):
+        #{sheet_name: rows with the header first}, same as fetch_values
+        from gspread.exceptions import APIError
+        from gspread.utils import absolute_range_name
+
+        sheet_names = list(sheet_names)
+        if not sheet_names:
+            return {}
+        spreadsheet = resource.spreadsheet()
+        header_ranges = [absolute_range_name(name, "1:1") for name in sheet_names]
+        try:
+            response = resource.call("values_batch_get", lambda: spreadsheet.values_batch_get(header_ranges),
+                                     key=tuple(header_ranges))
+        except APIError as error:
+            if retryable(error):
+                raise
+            return fetch_values(resource, sheet_names)
+
+        plans = {}
+        for name, value_range in zip(sheet_names, response.get("valueRanges", [])):
+            headers = (value_range.get("values") or [[]])[0]
+            positions = self.select(name, headers)
+            runs = column_runs(range(len(headers)) if positions is None else positions)
+            with self._lock:
+                previous = self._rows.get(name)
+            incremental = (name in self.append_only and previous is not None and len(previous) > 1
+                           and previous[0] == headers)
+            # From the last row held, to check it wasn't edited since
+            first_row = len(previous) if incremental else 2
+            ranges = [absolute_range_name(name, f"{column_letter(first)}{first_row}:{column_letter(last)}")
+                      for first, last in runs]
+            plans[name] = (headers, runs, ranges, previous, incremental)
+
+        ranges = [range_name for plan in plans.values() for range_name in plan[2]]
+        try:
+            response = resource.call("values_batch_get", lambda: spreadsheet.values_batch_get(ranges), key=tuple(ranges))
+        except APIError as error:
+            incremental = [name for name, plan in plans.items() if plan[4]]
+            if not incremental or not exceeds_grid(error):
+                raise
+            # Rows were deleted and the grid now ends above the last row held
+            logger.info("The grid of %s ends above the last read, reading in full", ", ".join(incremental))
+            self._forget(incremental)
+            return self.fetch(resource, sheet_names)
+        value_ranges = iter(response.get("valueRanges", []))
+        values = {}
+        edited = []
+        for name, (headers, runs, range_names, previous, incremental) in plans.items():
+            read = [next(value_ranges, {}).get("values", []) for _ in range_names]
+            size = len(json.dumps(read))
+            resource.record_values([cells for values_read in read for cells in values_read], size)
+            rows = self._merge(len(headers), runs, read)
+            if incremental:
+                if len(rows) < 2 or rows[0] != previous[-1]:
+                    # The revision moved without an append past the last row held: an edit in place
+                    edited.append(name)
+                    continue
+                rows = previous[:-1] + rows
+            else:
+                rows = [headers] + rows
+            if name in self.append_only:
+                with self._lock:
+                    self._rows[name] = rows
+            values[name] = rows
+            self._log(name, headers, runs, read, rows, size, incremental)
+        if edited:
+            logger.info("No new rows after the last read of %s, or it was edited, reading in full", ", ".join(edited))
+            self._forget(edited)
+            values.update(self.fetch(resource, edited))
+        return {name: values[name] for name in sheet_names}
+
+    @staticmethod
+    def _merge(width, runs, read):
+        #Rows of `width` cells from the values of each column run, '' where nothing was read
+        rows = [[''] * width for _ in range(max((len(values) for values in read), default=0))]
+        for (first, _), values in zip(runs, read):
+            for row, cells in zip(rows, values):
+                row[first:first + len(cells)] = cells
+        return rows
+
+    def _log(self, name, headers, runs, read, rows, size, incremental):
+        cells = sum(len(cells) for values in read for cells in values)
+        # Bytes per cell read, scaled to every row and column of the sheet
+        full_estimate = int(size / cells * len(rows) * len(headers)) if cells else size
+        with self._lock:
+            self.incremental_reads += incremental
+            self.full_reads += not incremental
+            self.bytes_read += size
+            self.bytes_full_estimate += full_estimate
+        logger.info("%s: read %d of %d columns, %d %s rows, %d bytes against about %d for the full sheet",
+                    name, sum(last - first + 1 for first, last in runs), len(headers),
+                    max((len(values) for values in read), default=0), "new" if incremental else "data", size, full_estimate)
+
+    def _forget(self, sheet_names):
+        #Drop the rows held for these sheets, their next fetch reads them in full
+        with self._lock:
+            for name in sheet_names:
+                self._rows.pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "full_reads": self.full_reads,
+                "incremental_reads": self.incremental_reads,
+                "bytes_read": self.bytes_read,
+                "bytes_full_estimate": self.bytes_full_estimate,
+            }
+
+
+def fetch_revision(resource):
+    #Drive modifiedTime of the spreadsheet, None when Drive metadata can't be read
+    from gspread.exceptions import APIError
+
+    try:
+        spreadsheet = resource.spreadsheet()
+        return resource.call("get_lastUpdateTime", spreadsheet.get_lastUpdateTime)
+    except APIError as error:
+        if retryable(error):
+            # Over quota or unavailable rather than no access to the metadata, keep the current snapshot
+            raise
+        logger.warning("Could not read the spreadsheet modifiedTime", exc_info=True)
+        return None
+
+
+def content_version(values_by_sheet):
+    #Stand-in version when there is no Drive revision to key on
+    payload = json.dumps(values_by_sheet, sort_keys=True).encode()
+    return "sha1:" + hashlib.sha1(payload).hexdigest()[:12]
+
+
+# version: Drive modifiedTime (or content hash), frames: {sheet_name: DataFrame}, fetched_at: epoch seconds
+Snapshot = namedtuple("Snapshot", ["version", "frames", "fetched_at"])
+
+
+class SheetCache:
+    """Last good snapshot of a set of worksheets, keyed on the spreadsheet revision.
+
+    The revision is checked at most every `check_interval` seconds. A newer version is
+    fetched on a background thread while callers keep getting the current snapshot, and
+    callers of `revalidate` (e.g. several Refresh clicks) during a check share its result.
+    With a `store` (snapshots.SnapshotStore) every fetched version is persisted and the
+    newest saved one is served right away on a cold start, then reconciled with the
+    live sheet. `offline=True` never touches the API and serves only saved snapshots.
+    `prepare(sheet_name, frame)` runs once on every newly fetched frame, e.g. to type it.
+    `derive(frames)` returns extra frames computed from the prepared ones, which are kept
+    (and saved) in the same snapshot. `fetch(resource, sheet_names)` reads the worksheets'
+    values, fetch_values by default (see ColumnReader.fetch). With nothing saved to serve,
+    the sheets in `deferred` are fetched on a thread while the first caller waits only
+    for the others: `get()` then returns a snapshot without them until `complete()` has
+    waited for the full one.
+    """
+
+    def __init__(self, resource, sheet_names, check_interval=30, clock=time.time, store=None, offline=False, prepare=None,
+                 derive=None, fetch=None, deferred=()):
+        self.resource = resource
+        self.sheet_names = tuple(sheet_names)
+        self.check_interval = check_interval
+        self.prepare = prepare or (lambda sheet_name, frame: frame)
+        self.derive = derive or (lambda frames: {})
+        self.fetch = fetch or fetch_values
+        self.deferred = set(deferred) & set(self.sheet_names)
+        self.store = store
+        self.offline = offline
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._snapshot = None
+        self._partial = None
+        self._deferred = None
+        self._refreshing = False
+        self._next_check = 0
+        self._loaded_dirname = None
+        self.checked_at = None
+        self.checks = 0
+        self.fetches = 0
+        self.errors = 0
+
+    def get(self):
+        snapshot = self._snapshot or self._warm_start()
+        if snapshot is None:
+            if self._partial is not None:
+                return self._partial
+            # Nothing to serve yet, the first caller has to wait for the fetch
+            if self.deferred and not self.offline:
+                return self._flight.run("cold_start", self._cold_start)
+            return self.revalidate()
+        if self._clock() >= self._next_check:
+            self._revalidate_in_background()
+        return snapshot
+
+    def _warm_start(self):
+        if self.store is None or self.offline:
+            return None
+        with self._fetch_lock:
+            if self._snapshot is None:
+                snapshot = self.store.load_latest()
+                if snapshot is not None:
+                    self._snapshot = snapshot
+                    self.checked_at = snapshot.fetched_at
+                    # Reconcile with the live sheet straight away
+                    self._next_check = 0
+            return self._snapshot
+
+    def complete(self, snapshot, timeout=None):
+        #`snapshot` with every worksheet, waiting for the deferred ones if it is missing them
+        if all(name in snapshot.frames for name in self.sheet_names):
+            return snapshot
+        return self._deferred.result(timeout)
+
+    def _cold_start(self):
+        #Fetches the sheets not deferred while the deferred ones download on a thread
+        if self._snapshot is not None or self._partial is not None:
+            return self._snapshot or self._partial
+        revision = fetch_revision(self.resource)
+        if revision is None:
+            # Without a revision the version is a hash of every sheet, so wait for all of them
+            return self.revalidate()
+        self.checks += 1
+        self.checked_at = self._clock()
+        first = Future()
+        self._deferred = Future()
+        threading.Thread(target=self._fetch_deferred, args=(revision, first, self._deferred), name="sheet-deferred",
+                         daemon=True).start()
+        try:
+            values = self.fetch(self.resource, [name for name in self.sheet_names if name not in self.deferred])
+            frames = {name: self.prepare(name, frame_from_values(rows)) for name, rows in values.items()}
+        except BaseException as error:
+            first.set_exception(error)
+            raise
+        self._partial = Snapshot(revision, frames, self._clock())
+        first.set_result(frames)
+        return self._partial
+
+    def _fetch_deferred(self, revision, first, done):
+        try:
+            values = self.fetch(self.resource, [name for name in self.sheet_names if name in self.deferred])
+            frames = {**first.result(), **{name: self.prepare(name, frame_from_values(rows)) for name, rows in values.items()}}
+            frames = {name: frames[name] for name in self.sheet_names}
+            frames.update(self.derive(frames))
+            snapshot = Snapshot(revision, frames, self._clock())
+            self.fetches += 1
+            self._snapshot = snapshot
+            self._partial = None
+            self.checked_at = snapshot.fetched_at
+            self._next_check = self.checked_at + self.check_interval
+            self._save(snapshot)
+            done.set_result(snapshot)
+        except BaseException as error:
+            self.errors += 1
+            # The next caller starts over once the first sheets are settled too
+            wait([first])
+            self._partial = None
+            logger.exception("Fetching the deferred worksheets failed")
+            done.set_exception(error)
+
+    def _revalidate_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_revalidate, name="sheet-revalidate", daemon=True).start()
+
+    def _background_revalidate(self):
+        try:
+            self.revalidate()
+        except Exception:
+            self.errors += 1
+            # Keep serving the last good snapshot and try again after the next interval
+            self._next_check = self._clock() + self.check_interval
+            logger.exception("Background revalidation failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def revalidate(self):
+        #Check the revision now and fetch the worksheets if it moved
+        return self._flight.run("revalidate", self._revalidate)
+
+    def _revalidate(self):
+        with self._fetch_lock:
+            self.checks += 1
+            if self.offline:
+                snapshot = self._revalidate_from_store()
+            else:
+                snapshot = self._revalidate_from_sheet()
+            self.checked_at = self._clock()
+            self._next_check = self.checked_at + self.check_interval
+            return snapshot
+
+    def _revalidate_from_sheet(self):
+        revision = fetch_revision(self.resource)
+        snapshot = self._snapshot
+        if snapshot is None or revision is None or revision != snapshot.version:
+            values = self.fetch(self.resource, self.sheet_names)
+            self.fetches += 1
+            version = revision or content_version(values)
+            if snapshot is None or version != snapshot.version:
+                frames = {name: self.prepare(name, frame_from_values(rows)) for name, rows in values.items()}
+                frames.update(self.derive(frames))
+                snapshot = Snapshot(version, frames, self._clock())
+                self._snapshot = snapshot
+                self._save(snapshot)
+        return snapshot
+
+    def _revalidate_from_store(self):
+        latest = self.store.latest_dirname() if self.store else None
+        if latest is None:
+            if self._snapshot is None:
+                raise RuntimeError("Offline mode is on but there is no saved snapshot to serve")
+            return self._snapshot
+        if self._snapshot is None or latest != self._loaded_dirname:
+            self._snapshot = self.store.load(latest)
+            self._loaded_dirname = latest
+            self.fetches += 1
+        return self._snapshot
+
+    def _save(self, snapshot):
+        if self.store is None:
+            return
+        try:
+            self.store.save(snapshot)
+        except OSError:
+            logger.warning("Could not save snapshot %s", snapshot.version, exc_info=True)
+
+    def stats(self):
+        return {
+            "version": self._snapshot.version if self._snapshot else None,
+            "checks": self.checks,
+            "fetches": self.fetches,
+            "errors": self.errors,
+            "coalesced": self._flight.coalesced,
+            "refreshing": self._refreshing,
+            "deferred_pending": self._deferred is not None and not self._deferred.done(),
+        }
@@ -0,0 +1,105 @@
+"""Local Arrow/Feather copies of every fetched worksheet, for warm starts and offline use."""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+from pyarrow import feather
+
+from sheets import Snapshot
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+LATEST = "LATEST"
+
+
+def version_dirname(version):
+    #Drive modifiedTime contains ':' which doesn't belong in a path
+    return re.sub(r"[^A-Za-z0-9._-]", "_", version)
+
+
+class SnapshotStore:
+    """One directory per data version, each holding a .feather file per worksheet.
+
+    `LATEST` names the newest complete version and is swapped atomically, so a reader
+    never sees a half-written snapshot. Snapshots saved under a different `tag` (e.g. an
+    older schema version) are ignored on load.
+    """
+
+    def __init__(self, directory, keep=3, tag=None):
+        self.directory = directory
+        self.keep = keep
+        self.tag = tag
+
+    def save(self, snapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        target = os.path.join(self.directory, version_dirname(f"{snapshot.version}-{self.tag}" if self.tag is not None else snapshot.version))
+        if not os.path.exists(target):
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=self.directory)
+            files = {}
+            for i, (sheet_name, frame) in enumerate(snapshot.frames.items()):
+                files[sheet_name] = f"{i}.feather"
+                # Uncompressed so the file can be memory-mapped on load
+                feather.write_feather(frame.reset_index(drop=True), os.path.join(staging, files[sheet_name]), compression="uncompressed")
+            manifest = {"version": snapshot.version, "fetched_at": snapshot.fetched_at, "tag": self.tag, "files": files}
+            with open(os.path.join(staging, MANIFEST), "w") as f:
+                json.dump(manifest, f)
+            try:
+                os.replace(staging, target)
+            except OSError:
+                # Another process saved the same version first
+                shutil.rmtree(staging, ignore_errors=True)
+        self._write_latest(os.path.basename(target))
+        self._prune()
+
+    def _write_latest(self, dirname):
+        fd, tmp = tempfile.mkstemp(prefix=".latest-", dir=self.directory)
+        with os.fdopen(fd, "w") as f:
+            f.write(dirname)
+        os.replace(tmp, os.path.join(self.directory, LATEST))
+
+    def _prune(self):
+        versions = [d for d in self.versions() if d != self.latest_dirname()]
+        for dirname in versions[:max(len(versions) - (self.keep - 1), 0)]:
+            shutil.rmtree(os.path.join(self.directory, dirname), ignore_errors=True)
+
+    def versions(self):
+        #Saved version directories, oldest first
+        if not os.path.isdir(self.directory):
+            return []
+        dirs = [d for d in os.listdir(self.directory) if os.path.isfile(os.path.join(self.directory, d, MANIFEST))]
+        return sorted(dirs, key=lambda d: os.path.getmtime(os.path.join(self.directory, d, MANIFEST)))
+
+    def latest_dirname(self):
+        try:
+            with open(os.path.join(self.directory, LATEST)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, dirname):
+        path = os.path.join(self.directory, dirname)
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get("tag") != self.tag:
+            raise ValueError(f"Snapshot {dirname} was saved with tag {manifest.get('tag')!r}, expected {self.tag!r}")
+        frames = {
+            sheet_name: feather.read_table(os.path.join(path, filename), memory_map=True).to_pandas()
+            for sheet_name, filename in manifest["files"].items()
+        }
+        return Snapshot(manifest["version"], frames, manifest["fetched_at"])
+
+    def load_latest(self):
+        #Newest saved snapshot, or None when there is nothing usable on disk
+        dirname = self.latest_dirname()
+        if dirname is None:
+            return None
+        try:
+            return self.load(dirname)
+        except (OSError, ValueError, KeyError):
+            logger.warning("Could not read snapshot %s", dirname, exc_info=True)
+            return None
@@ -0,0 +1,72 @@
+"""ColumnReader's incremental reads of append-only sheets against full reads."""
+
+from schema import read_columns
+from sheets import ColumnReader, SheetsResource
+from tools.fake_gspread import FakeClient, FakeCredentials
+
+
+def reader_and_client(sheets, spare_rows=0):
+    client = FakeClient(sheets, spare_rows=spare_rows)
+    resource = SheetsResource({"spreadsheet": "https://example.com/fake"},
+                              connect=lambda creds_dict: (client, FakeCredentials()))
+    return ColumnReader(read_columns, append_only=["Weekly"]), resource, client
+
+
+def weekly(rows):
+    header = ["INITIATIVE", "CITY", "PLATFORM", "OWNER", "WEEK 1\n2024-01-01 to 2024-01-07"]
+    return [header] + [[f"Initiative {i}", "Dubai", "iOS", "Sam", "Rollout"] for i in range(rows)]
+
+
+def full_read(sheets):
+    reader, resource, _ = reader_and_client(sheets, spare_rows=10)
+    return reader.fetch(resource, ["Weekly"])["Weekly"]
+
+
+def test_appended_rows_are_read_incrementally():
+    for spare_rows in (0, 10):
+        reader, resource, client = reader_and_client({"Weekly": weekly(3)}, spare_rows)
+        reader.fetch(resource, ["Weekly"])
+        client.update_sheet("Weekly", weekly(5))
+        values = reader.fetch(resource, ["Weekly"])["Weekly"]
+        assert values == full_read({"Weekly": weekly(5)})
+        assert reader.stats()["incremental_reads"] == 1
+
+
+def test_full_grid_without_new_rows_falls_back_to_a_full_read():
+    # Rows filled by append_row leave no spare rows, so the range below them is out of the grid
+    reader, resource, client = reader_and_client({"Weekly": weekly(3)})
+    reader.fetch(resource, ["Weekly"])
+    edited = weekly(3)
+    edited[1][4] = "Paused"
+    client.update_sheet("Weekly", edited)
+    values = reader.fetch(resource, ["Weekly"])["Weekly"]
+    assert values == full_read({"Weekly": edited})
+    assert reader.stats()["full_reads"] == 2
+
+
+def test_rows_edited_in_place_are_read_again():
+    # Spare rows below the data keep the range past the last row inside the grid
+    reader, resource, client = reader_and_client({"Weekly": weekly(3)}, spare_rows=10)
+    reader.fetch(resource, ["Weekly"])
+    edited = weekly(3)
+    edited[1][4] = "Paused"
+    client.update_sheet("Weekly", edited)
+    assert reader.fetch(resource, ["Weekly"])["Weekly"] == full_read({"Weekly": edited})
+
+    # An edit to the last row held is caught even when rows were appended with it
+    appended = weekly(5)
+    appended[1][4] = "Paused"
+    appended[3][4] = "No Rollout"
+    client.update_sheet("Weekly", appended)
+    assert reader.fetch(resource, ["Weekly"])["Weekly"] == full_read({"Weekly": appended})
+    stats = reader.stats()
+    assert stats["full_reads"] == 3 and stats["incremental_reads"] == 0
+
+
+def test_read_columns_missing_from_the_header_row_are_logged(caplog):
+    sheets = {"Experiments": [["INITIATIVE", "CITY ", "STAGE"], ["Pricing", "Dubai", "Running"]]}
+    reader, resource, _ = reader_and_client(sheets)
+    with caplog.at_level("WARNING", logger="schema"):
+        values = reader.fetch(resource, ["Experiments"])["Experiments"]
+    assert values == [["INITIATIVE", "CITY ", "STAGE"], ["Pricing", "", "Running"]]
+    assert "'CITY'" in caplog.text and "'START DATE'" in caplog.text
@@ -0,0 +1,66 @@
+"""ConcurrencySweep against counting the running experiments day by day."""
+
+import numpy as np
+import pandas as pd
+
+from pipeline import BLANK_LABEL, ConcurrencySweep
+
+
+def experiments(rows):
+    #exp_view columns the sweep reads, rows of (START DATE, END DATE, CITY, SUB DOMAIN)
+    frame = pd.DataFrame(rows, columns=["START DATE", "END DATE", "CITY", "SUB DOMAIN"])
+    frame["START DATE"] = pd.to_datetime(frame["START DATE"])
+    frame["END DATE"] = pd.to_datetime(frame["END DATE"])
+    return frame
+
+
+def day_by_day(exp_view, days):
+    #Experiments with START DATE <= day <= END DATE (or no END DATE) on every day
+    start = exp_view["START DATE"].to_numpy(dtype="datetime64[D]")
+    end = exp_view["END DATE"].to_numpy(dtype="datetime64[D]")
+    end = np.where(np.isnat(end), np.datetime64("2262-01-01"), np.maximum(end, start))
+    return [int(((start <= day) & (end >= day)).sum()) for day in days.to_numpy(dtype="datetime64[D]")]
+
+
+EXPERIMENTS = experiments([
+    ("2024-01-01", "2024-01-10", "Dubai", "Pricing"),
+    ("2024-01-05", "2024-01-05", "Dubai", ""),
+    ("2024-01-08", None, "", "Growth"),
+    ("2024-01-03", "2024-01-02", "Cairo", None),
+    ("2024-01-10", "2024-01-20", None, "Pricing"),
+    (None, "2024-01-04", "Cairo", "Ops"),
+])
+
+
+def test_daily_total_matches_day_by_day_count():
+    series = ConcurrencySweep(EXPERIMENTS).series(np.arange(len(EXPERIMENTS)))
+    assert series["Experiments"].tolist() == day_by_day(EXPERIMENTS, series.index)
+
+
+def test_split_adds_up_to_the_total():
+    sweep = ConcurrencySweep(EXPERIMENTS)
+    total = sweep.series(np.arange(len(EXPERIMENTS)))["Experiments"]
+    for dim in ("CITY", "SUB DOMAIN"):
+        split = sweep.series(np.arange(len(EXPERIMENTS)), by=dim)
+        assert split.sum(axis=1).tolist() == total.tolist()
+
+
+def test_blank_values_form_one_labelled_series():
+    split = ConcurrencySweep(EXPERIMENTS).series(np.arange(len(EXPERIMENTS)), by="CITY")
+    assert sorted(split.columns) == sorted(["Dubai", "Cairo", BLANK_LABEL])
+    blank = EXPERIMENTS[EXPERIMENTS["CITY"].isna() | (EXPERIMENTS["CITY"] == "")]
+    assert split[BLANK_LABEL].tolist() == day_by_day(blank, split.index)
+
+
+def test_selected_rows_only():
+    rows = np.array([0, 4])
+    series = ConcurrencySweep(EXPERIMENTS).series(rows)
+    assert series["Experiments"].tolist() == day_by_day(EXPERIMENTS.take(rows), series.index)
+    assert ConcurrencySweep(EXPERIMENTS).series(np.array([], dtype=int)).empty
+
+
+def test_weekly_peak():
+    weekly = ConcurrencySweep(EXPERIMENTS).series(np.arange(len(EXPERIMENTS)), freq="W")
+    daily = ConcurrencySweep(EXPERIMENTS).series(np.arange(len(EXPERIMENTS)))
+    assert (weekly.index.dayofweek == 0).all()
+    assert weekly["Experiments"].tolist() == daily["Experiments"].resample("W-MON", label="left", closed="left").max().tolist()
@@ -0,0 +1,79 @@
+"""The vectorized rollout_intervals against the row-by-row transform_data it replaced."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import ROLLOUT_COLUMNS, rollout_intervals, rollout_intervals_rowwise
+
+
+def week_header(week):
+    start = pd.Timestamp("2024-01-01") + pd.Timedelta(weeks=week)
+    return f"WEEK {week + 1}\n{start:%Y-%m-%d} to {start + pd.Timedelta(days=6):%Y-%m-%d}"
+
+
+def weekly_frame(grid, weeks=None):
+    #Prepared Weekly layout: INITIATIVE, CITY, PLATFORM, then one column per week
+    weeks = len(grid[0]) if weeks is None else weeks
+    columns = ["INITIATIVE", "CITY", "PLATFORM"] + [week_header(week) for week in range(weeks)]
+    rows = [[f"Initiative {i}", "Dubai", "iOS"] + list(cells) for i, cells in enumerate(grid)]
+    return pd.DataFrame(rows, columns=columns, dtype=object)
+
+
+def assert_same_intervals(weekly):
+    vectorized = rollout_intervals(weekly)[ROLLOUT_COLUMNS].reset_index(drop=True)
+    rowwise = rollout_intervals_rowwise(weekly).reset_index(drop=True)
+    pd.testing.assert_frame_equal(vectorized, rowwise, check_dtype=False, check_index_type=False)
+    return vectorized
+
+
+GRIDS = {
+    "nan cells": [
+        ["Rollout", np.nan, "Rollout", "Rollout", np.nan],
+        [np.nan, "In Experiment", "In Experiment", np.nan, np.nan],
+        [np.nan, np.nan, np.nan, np.nan, np.nan],
+    ],
+    "empty string cells": [
+        ["", "", "Rollout", "", "Paused"],
+        ["In Experiment", "", np.nan, "", "Rollout"],
+    ],
+    "runs reaching the last week": [
+        ["In Experiment", "Awaiting Results", "Rollout", "Rollout"],
+        ["Paused", "Paused", "Paused", "Paused"],
+        [np.nan, np.nan, np.nan, "No Rollout"],
+    ],
+    "stage changes without a gap": [
+        ["In Experiment", "Awaiting Results", "In Experiment", np.nan, "In Experiment", "In Experiment"],
+    ],
+    "single week": [["Rollout"], [np.nan], [""]],
+}
+
+
+@pytest.mark.parametrize("grid", GRIDS.values(), ids=GRIDS.keys())
+def test_matches_rowwise(grid):
+    assert_same_intervals(weekly_frame(grid))
+
+
+def test_run_reaching_the_last_week_finishes_with_it():
+    intervals = assert_same_intervals(weekly_frame([[np.nan, "Rollout", "Rollout"]]))
+    assert intervals[["start", "finish"]].values.tolist() == [["2024-01-08", "2024-01-21"]]
+
+
+def test_empty_string_cells_are_a_stage():
+    intervals = assert_same_intervals(weekly_frame([["", "", "Rollout"]]))
+    assert intervals["stage"].tolist() == ["", "Rollout"]
+
+
+def test_empty_grid():
+    assert assert_same_intervals(weekly_frame([], weeks=4)).empty
+    assert assert_same_intervals(weekly_frame([[], []], weeks=0)).empty
+
+
+def test_synthetic_sheet():
+    from schema import apply_schema
+    from pipeline import prepare_weekly
+    from sheets import frame_from_values
+    from tools.synthetic import weekly_sheet
+
+    weekly = prepare_weekly(apply_schema("Weekly", frame_from_values(weekly_sheet(200, 30, seed=1))))
+    assert len(assert_same_intervals(weekly))
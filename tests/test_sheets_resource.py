@@ -0,0 +1,80 @@
+"""SheetsResource's shared in-flight calls and retries, against the fake gspread."""
+
+import threading
+
+import pytest
+from gspread.exceptions import APIError
+
+from sheets import SheetsResource, fetch_values, fetch_values_threaded
+from tools.fake_gspread import FakeClient, FakeCredentials
+
+SHEETS = {"Experiments": [["INITIATIVE", "CITY"], ["Pricing", "Dubai"]],
+          "Weekly": [["INITIATIVE", "WEEK 1"], ["Pricing", "Rollout"]]}
+
+
+def resource_and_client(latency=0, **options):
+    client = FakeClient(SHEETS, latency=latency)
+    resource = SheetsResource({"spreadsheet": "https://example.com/fake"},
+                              connect=lambda creds_dict: (client, FakeCredentials()), **options)
+    return resource, client
+
+
+def called(client, name):
+    return sum(call[0] == name for call in client.calls)
+
+
+def test_concurrent_reads_share_one_request():
+    resource, client = resource_and_client(latency=0.2)
+    sessions = 10
+    start = threading.Barrier(sessions)
+    results = []
+
+    def load():
+        start.wait()
+        results.append(fetch_values(resource, list(SHEETS)))
+
+    threads = [threading.Thread(target=load) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [dict(SHEETS)] * sessions
+    assert called(client, "open_by_url") == 1
+    assert called(client, "values_batch_get") == 1
+    assert resource.stats()["coalesced"] >= sessions - 1
+
+
+def test_quota_errors_are_retried_with_backoff():
+    sleeps = []
+    resource, client = resource_and_client(backoff_base=0.5, backoff_max=0.75, sleep=sleeps.append)
+    client.inject_errors(3, status=429)
+
+    assert fetch_values(resource, list(SHEETS)) == SHEETS
+    stats = resource.stats()
+    assert stats["retries"] == stats["rate_limited"] == 3
+    assert len(sleeps) == 3
+    assert sleeps[0] <= 0.5 and max(sleeps) <= 0.75
+
+
+def test_lookups_inside_a_read_are_not_retried_again():
+    # Retried on their own as well, the lookups alone would get up to 3 x 3 attempts
+    sleeps = []
+    resource, client = resource_and_client(retry_attempts=3, sleep=sleeps.append)
+    client.inject_errors(5, status=503)
+
+    with pytest.raises(APIError):
+        fetch_values_threaded(resource, ["Weekly"])
+    assert len(client.calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_other_errors_are_not_retried():
+    sleeps = []
+    resource, client = resource_and_client(sleep=sleeps.append)
+    client.inject_errors(1, status=403)
+
+    with pytest.raises(APIError):
+        fetch_values_threaded(resource, ["Weekly"])
+    assert len(client.calls) == 1
+    assert sleeps == []
@@ -0,0 +1,85 @@
+"""Build time and payload size of the rollouts Gantt chart for growing row counts.
+
+    python -m tools.bench_gantt [--sizes 100 1000 5000] [--per-row-limit 1000] [--output results.json]
+
+Compares the former one-add_annotation-per-row loop with the batched label modes
+of charts.rollout_figure.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from charts import rollout_base_figure, rollout_figure, rollout_label_annotations
+
+STAGES = ['In Experiment', 'Awaiting Results', 'Rollout', 'No Rollout', 'Paused']
+
+
+def synthetic_rollouts(rows, seed=0):
+    #One interval per Initiative-city-platform, sorted by start like pipeline.RolloutTable
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2023-01-02") + pd.to_timedelta(rng.integers(0, 100, rows) * 7, unit="D")
+    finish = start + pd.to_timedelta(rng.integers(1, 20, rows) * 7 - 1, unit="D")
+    frame = pd.DataFrame({
+        'Initiative-city-platform': [f"Initiative {i}-City {i % 7}-iOS" for i in range(rows)],
+        'stage': rng.choice(STAGES, rows),
+        'start': start,
+        'finish': finish.strftime("%Y-%m-%d"),
+    })
+    return frame.sort_values(by="start", kind="stable").reset_index(drop=True)
+
+
+def per_row_annotations(transformed_df):
+    fig2, labels, _ = rollout_base_figure(transformed_df)
+    for annotation in rollout_label_annotations(labels):
+        fig2.add_annotation(**annotation)
+    return fig2
+
+
+def measure(build, transformed_df):
+    started = time.perf_counter()
+    fig = build(transformed_df)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    payload = fig.to_json()
+    return {
+        "build_s": round(build_seconds, 4),
+        "serialize_s": round(time.perf_counter() - started, 4),
+        "payload_bytes": len(payload.encode()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--per-row-limit", type=int, default=1000,
+                        help="skip the per-row loop above this many rows, it is quadratic (~5 min at 1,000)")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    builders = {
+        "per-row add_annotation": per_row_annotations,
+        "batched annotations": lambda df: rollout_figure(df, label_mode="annotations"),
+        "text trace": lambda df: rollout_figure(df, label_mode="text"),
+    }
+    results = []
+    for rows in args.sizes:
+        transformed_df = synthetic_rollouts(rows)
+        for name, build in builders.items():
+            if build is per_row_annotations and rows > args.per_row_limit:
+                continue
+            result = {"rows": rows, "mode": name, **measure(build, transformed_df)}
+            results.append(result)
+            print(f"{rows:>6} rows  {name:<24} build {result['build_s']:>8.3f} s  "
+                  f"serialize {result['serialize_s']:>7.3f} s  payload {result['payload_bytes'] / 1024:>9.1f} KiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
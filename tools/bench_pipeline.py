@@ -0,0 +1,128 @@
+"""Time every stage of the dashboard pipeline on synthetic sheets served by the fake gspread.
+
+    python -m tools.bench_pipeline [--experiments 2000 20000] [--weeks 150] [--weekly-rows 500]
+                                   [--cities 5] [--initiatives 12] [--latency 0] [--repeat 3]
+                                   [--output bench_pipeline.json]
+
+Stages: load (values_batch_get through SheetsResource, then only the columns the schema
+reads through sheets.ColumnReader), header dedupe (frame_from_values),
+preprocessing (schema typing, prepare_experiments, prepare_weekly), transform_data (the
+vectorized rollout intervals, plus the row-by-row reference unless --skip-rowwise),
+filtering (index builds and one lookup per city), aggregation (experiment cube and
+summaries), concurrency (the sweep's events and the daily and weekly series per city),
+figure construction (experiments table and Gantt) and JSON serialization.
+Each stage reports the best of --repeat runs. The results are written as JSON so two
+runs can be diffed.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+import plotly.graph_objects as go
+
+from charts import experiments_table, figure_json, rollout_figure
+from pipeline import (ConcurrencySweep, ExperimentCube, FilterIndex, RolloutTable, prepare_experiments, prepare_weekly,
+                      rollout_intervals, rollout_intervals_rowwise, summarize_cells, table_page)
+from schema import apply_schema, read_columns
+from sheets import ColumnReader, SheetsResource, fetch_values, frame_from_values
+from tools.fake_gspread import fake_connect
+from tools.synthetic import city_names, synthetic_sheets
+
+SHEET_NAMES = ["Experiments", "Weekly"]
+
+
+def best_of(repeat, func):
+    #Result of the last run and the fastest time
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - started)
+    return result, min(seconds)
+
+
+def run_pipeline(sheets, cities, repeat, latency=0, rowwise=True):
+    """Seconds per stage for one set of synthetic sheets."""
+    resource = SheetsResource({"spreadsheet": "https://example.com/fake"}, connect=fake_connect(sheets, latency=latency))
+    stages = {}
+
+    values, stages["load"] = best_of(repeat, lambda: fetch_values(resource, SHEET_NAMES))
+    reader = ColumnReader(read_columns)
+    _, stages["load (needed columns)"] = best_of(repeat, lambda: reader.fetch(resource, SHEET_NAMES))
+    raw, stages["header dedupe"] = best_of(repeat, lambda: {name: frame_from_values(values[name]) for name in SHEET_NAMES})
+
+    def preprocess():
+        typed = {name: apply_schema(name, frame) for name, frame in raw.items()}
+        return prepare_experiments(typed["Experiments"], datetime(2024, 6, 1)), prepare_weekly(typed["Weekly"])
+    (exp_view, weekly), stages["preprocessing"] = best_of(repeat, preprocess)
+
+    intervals, stages["transform_data"] = best_of(repeat, lambda: rollout_intervals(weekly, extra_columns=["CITY", "INITIATIVE"]))
+    if rowwise:
+        _, stages["transform_data (row-wise)"] = best_of(repeat, lambda: rollout_intervals_rowwise(weekly))
+
+    def filtering():
+        index, rollouts = FilterIndex(exp_view), RolloutTable(weekly)
+        for city in ['All'] + cities:
+            index.positions({"CITY": city}, exp_view["START DATE"].min(), exp_view["START DATE"].max())
+            rollouts.select(city)
+        return index, rollouts
+    (index, rollouts), stages["filtering"] = best_of(repeat, filtering)
+
+    def aggregation():
+        cube = ExperimentCube(exp_view)
+        first, last = exp_view["START DATE"].min(), exp_view["START DATE"].max()
+        return [summarize_cells(cube.slice({"CITY": city}, first, last)) for city in ['All'] + cities]
+    _, stages["aggregation"] = best_of(repeat, aggregation)
+
+    def concurrency():
+        sweep = ConcurrencySweep(exp_view)
+        all_rows = index.positions({})
+        for city in ['All'] + cities:
+            sweep.series(index.positions({"CITY": city}))
+        return sweep.series(all_rows), sweep.series(all_rows, by="CITY", freq="W")
+    _, stages["concurrency"] = best_of(repeat, concurrency)
+
+    def figures():
+        page = table_page(exp_view, index.positions({}), page_size=50)
+        return go.Figure(data=[experiments_table(exp_view.take(page))]), rollout_figure(rollouts.select(cities[0]))
+    (table_fig, gantt_fig), stages["figure construction"] = best_of(repeat, figures)
+
+    payloads, stages["JSON serialization"] = best_of(repeat, lambda: [figure_json(table_fig), figure_json(gantt_fig)])
+    return stages, {"intervals": len(intervals), "payload_bytes": sum(len(p) for p in payloads),
+                    "load_bytes": len(json.dumps(values)), "needed_columns_bytes": reader.stats()["bytes_read"] // repeat}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--experiments", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--weeks", type=int, default=150)
+    parser.add_argument("--weekly-rows", type=int, default=500)
+    parser.add_argument("--cities", type=int, default=5)
+    parser.add_argument("--initiatives", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every fake API call")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-rowwise", action="store_true", help="don't time the row-by-row transform_data")
+    parser.add_argument("--output", default="bench_pipeline.json")
+    args = parser.parse_args()
+
+    results = []
+    for experiments in args.experiments:
+        params = {"experiments": experiments, "weeks": args.weeks, "weekly_rows": args.weekly_rows,
+                  "cities": args.cities, "initiatives": args.initiatives, "latency": args.latency}
+        sheets = synthetic_sheets(experiments, args.weeks, args.weekly_rows, args.cities, args.initiatives)
+        stages, checks = run_pipeline(sheets, city_names(args.cities), args.repeat, args.latency, not args.skip_rowwise)
+        print(f"{experiments} experiments, {args.weekly_rows} x {args.weeks} weekly grid, {args.cities} cities")
+        for stage, seconds in stages.items():
+            print(f"  {stage:<26} {seconds * 1000:>9.1f} ms")
+        print(f"  {checks['intervals']} rollout intervals")
+        results.append({"params": params, "stages": stages, "checks": checks})
+
+    with open(args.output, "w") as f:
+        json.dump({"created": datetime.now().isoformat(timespec="seconds"), "repeat": args.repeat, "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""API calls and failures when many sessions reload the sheets at once, e.g. after Refresh Data.
+
+    python -m tools.bench_refresh [--sessions 1 10 50] [--latency 0.2] [--quota 20] [--window 10]
+                                  [--backoff-base 0.05] [--output results.json]
+
+"per-session fetch" is every session reading the worksheets with its own client, as
+when each one ran load_data after the cache was cleared. "shared cache" is every
+session calling SheetCache.revalidate() on one cache, which lets one revision check and
+fetch run and hands its result to the others. Both use the fake gspread with a quota of
+--quota calls per --window seconds (429 beyond it), retried with jittered backoff.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+
+from sheets import SheetCache, SheetsResource, fetch_values
+from tools.fake_gspread import fake_connect
+from tools.synthetic import synthetic_sheets
+
+SHEET_NAMES = ["Experiments", "Weekly"]
+
+
+def resource_for(connect, backoff_base):
+    return SheetsResource({"spreadsheet": "https://example.com/fake"}, connect=connect, backoff_base=backoff_base)
+
+
+def per_session_fetch(connect, sessions, backoff_base):
+    resources = [resource_for(connect, backoff_base) for _ in range(sessions)]
+    return [lambda resource=resource: fetch_values(resource, SHEET_NAMES) for resource in resources], resources, []
+
+
+def shared_cache(connect, sessions, backoff_base):
+    resource = resource_for(connect, backoff_base)
+    cache = SheetCache(resource, SHEET_NAMES)
+    return [cache.revalidate] * sessions, [resource], [cache]
+
+
+def burst(layout, sessions, sheets, latency, quota, window, backoff_base):
+    #Starts every session's load at the same moment and waits for all of them
+    connect = fake_connect(sheets, latency=latency, quota=quota, window=window)
+    loads, resources, caches = layout(connect, sessions, backoff_base)
+    failures = []
+
+    def run(load):
+        try:
+            load()
+        except Exception as error:
+            failures.append(error)
+
+    threads = [threading.Thread(target=run, args=(load,)) for load in loads]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = [resource.stats() for resource in resources]
+    cache_stats = [cache.stats() for cache in caches]
+    return {
+        "seconds": round(time.perf_counter() - started, 3),
+        "api_calls": len(connect.client.calls),
+        "rejected_429": sum(status == 429 for _, status in connect.client.rejected),
+        "retries": sum(s["retries"] for s in stats),
+        "coalesced": sum(s["coalesced"] for s in stats + cache_stats),
+        "failed_sessions": len(failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every fake API call")
+    parser.add_argument("--quota", type=int, default=20, help="API calls allowed per window")
+    parser.add_argument("--window", type=float, default=10, help="quota window in seconds")
+    parser.add_argument("--backoff-base", type=float, default=0.05, help="first retry waits up to this many seconds")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+    # One warning per retry would drown the table
+    logging.getLogger("sheets").setLevel(logging.ERROR)
+
+    sheets = synthetic_sheets(2000)
+    layouts = {"per-session fetch": per_session_fetch, "shared cache": shared_cache}
+    results = []
+    for sessions in args.sessions:
+        for name, layout in layouts.items():
+            result = {"sessions": sessions, "layout": name,
+                      **burst(layout, sessions, sheets, args.latency, args.quota, args.window, args.backoff_base)}
+            results.append(result)
+            print(f"{sessions:>4} sessions  {name:<18} {result['api_calls']:>5} API calls  {result['rejected_429']:>4} x 429  "
+                  f"{result['retries']:>4} retries  {result['coalesced']:>4} coalesced  "
+                  f"{result['failed_sessions']:>3} failed  {result['seconds']:>6.2f} s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
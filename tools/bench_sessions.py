@@ -0,0 +1,80 @@
+"""Memory held by concurrent sessions: per-session copies against shared frames.
+
+    python -m tools.bench_sessions [--sessions 1 10 50] [--rows 5000] [--output results.json]
+
+"per-session copies" is what st.cache_data does with exp_view and the Weekly frame
+(every session gets its own unpickled copy) plus a filtered copy for the table.
+"shared" is the st.cache_resource layout: one exp_view and one Weekly frame for
+everybody, each session holding only its filtered row positions and one table page.
+Allocations are measured with tracemalloc.
+"""
+
+import argparse
+import gc
+import json
+import pickle
+import tracemalloc
+
+from pipeline import FilterIndex, prepare_weekly, table_page
+from schema import apply_schema
+from sheets import frame_from_values
+from tools.bench_table import CITIES, synthetic_experiments
+from tools.synthetic import weekly_sheet
+
+
+def synthetic_weekly(rows, weeks=150, seed=0):
+    #Typed and cleaned like the Weekly worksheet in the app
+    raw = frame_from_values(weekly_sheet(rows, weeks, cities=len(CITIES), seed=seed))
+    return prepare_weekly(apply_schema("Weekly", raw))
+
+
+def per_session_copies(exp_view, weekly, index, filters):
+    exp_copy = pickle.loads(pickle.dumps(exp_view))
+    weekly_copy = pickle.loads(pickle.dumps(weekly))
+    return exp_copy, weekly_copy, exp_copy.take(index.positions(filters))
+
+
+def shared(exp_view, weekly, index, filters):
+    positions = index.positions(filters)
+    return exp_view, weekly, positions, exp_view.take(table_page(exp_view, positions, page_size=50))
+
+
+def session_memory(layout, sessions, exp_view, weekly, index):
+    cities = ['All'] + CITIES
+    gc.collect()
+    tracemalloc.start()
+    held = [layout(exp_view, weekly, index, {"CITY": cities[i % len(cities)]}) for i in range(sessions)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {"held_bytes": current, "peak_bytes": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--rows", type=int, default=5000, help="experiments rows, the Weekly sheet gets a tenth")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    exp_view = synthetic_experiments(args.rows)
+    weekly = synthetic_weekly(max(args.rows // 10, 1))
+    index = FilterIndex(exp_view)
+    dataset_bytes = int(exp_view.memory_usage(deep=True).sum() + weekly.memory_usage(deep=True).sum())
+    print(f"exp_view + Weekly: {dataset_bytes / 2 ** 20:.1f} MiB, held once in the shared layout")
+    layouts = {"per-session copies": per_session_copies, "shared": shared}
+    results = []
+    for sessions in args.sessions:
+        for name, layout in layouts.items():
+            result = {"sessions": sessions, "layout": name, **session_memory(layout, sessions, exp_view, weekly, index)}
+            results.append(result)
+            print(f"{sessions:>4} sessions  {name:<20} held {result['held_bytes'] / 2 ** 20:>8.1f} MiB  "
+                  f"peak {result['peak_bytes'] / 2 ** 20:>8.1f} MiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
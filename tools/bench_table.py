@@ -0,0 +1,106 @@
+"""Build time, serialization time and payload size of the experiments table in fig1.
+
+    python -m tools.bench_table [--sizes 100 1000 10000] [--output results.json]
+
+Compares the former per-cell '<b>' wrapping and row-wise hyperlinks, serialized the
+way st.plotly_chart does it, with charts.experiments_table serialized by figure_json.
+The table is the only trace of fig1 that grows with the number of filtered experiments.
+"""
+
+import argparse
+import json
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.utils
+
+from charts import experiments_table, figure_json
+from pipeline import prepare_experiments
+from schema import apply_schema
+from sheets import frame_from_values
+from tools.synthetic import city_names, experiments_sheet
+
+CITIES = city_names(7)
+
+
+def synthetic_experiments(rows, seed=0):
+    #Typed and prepared like the Experiments worksheet in the app
+    raw = frame_from_values(experiments_sheet(rows, cities=len(CITIES), initiatives=60, seed=seed))
+    return prepare_experiments(apply_schema("Experiments", raw), pd.Timestamp("2024-06-01"))
+
+
+def per_cell_table(filtered_exp_view):
+    #The table as it was built before charts.experiments_table
+    filtered_exp_view = filtered_exp_view.copy()
+    filtered_exp_view["END DATE"] = filtered_exp_view["END DATE"].dt.strftime("%Y-%m-%d")
+    filtered_exp_view["START DATE"] = filtered_exp_view["START DATE"].dt.strftime("%Y-%m-%d")
+    fill = {"Completed": 'rgb(4,76,60)', "Running": 'rgb(87,74,217)', "Paused": 'rgba(235,79,107,255)'}
+    cell_colors = [fill.get(stage, 'black') for stage in filtered_exp_view["STAGE"]]
+    filtered_exp_view = filtered_exp_view.applymap(lambda x: f'<b>{x}</b>')
+
+    def create_hyperlink(row):
+        link = str(row["Experiment Doc Link"]).replace("<b>", "").replace("</b>", "")
+        return f'<a href="{link}">{row["INITIATIVE"]}</a>'
+
+    filtered_exp_view["INITIATIVE"] = filtered_exp_view.apply(create_hyperlink, axis=1)
+    columns = ["INITIATIVE", "CITY", "STAGE", "SUB DOMAIN", "START DATE", "END DATE", "DURATION", "DAYS REMAINING"]
+    return go.Table(
+        domain=dict(x=[0, 0.495], y=[0, 1.0]),
+        header=dict(values=[f"<b>{col}</b>" for col in columns], fill_color='rgb(4,76,60)', align='center',
+                    font=dict(color='rgb(19,230,143)', size=14, family='PT Sans Narrow'),
+                    line_color='rgb(19,230,143)', line_width=2),
+        cells=dict(values=[filtered_exp_view[col] for col in columns], fill_color=[cell_colors], align='center',
+                   line_color='rgb(19,230,143)', line_width=2),
+        cells_font=dict(color='white', size=13, family='PT Sans Narrow'),
+    )
+
+
+def streamlit_json(fig):
+    #What st.plotly_chart does with a figure in streamlit 1.27
+    return json.dumps(fig.to_dict(), cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def measure(build, serialize, exp_view):
+    started = time.perf_counter()
+    fig = go.Figure(data=[build(exp_view)])
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    payload = serialize(fig)
+    return {
+        "build_s": round(build_seconds, 4),
+        "serialize_s": round(time.perf_counter() - started, 4),
+        "payload_bytes": len(payload.encode()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    variants = {
+        "per-cell html, json": (per_cell_table, streamlit_json),
+        "typed columns, json": (experiments_table, streamlit_json),
+        "typed columns, figure_json": (experiments_table, figure_json),
+    }
+    # Warm up plotly's validators so the first size isn't charged for their imports
+    for build, serialize in variants.values():
+        measure(build, serialize, synthetic_experiments(10))
+    results = []
+    for rows in args.sizes:
+        exp_view = synthetic_experiments(rows)
+        for name, (build, serialize) in variants.items():
+            result = {"rows": rows, "variant": name, **measure(build, serialize, exp_view)}
+            results.append(result)
+            print(f"{rows:>6} rows  {name:<28} build {result['build_s']:>7.3f} s  "
+                  f"serialize {result['serialize_s']:>7.3f} s  payload {result['payload_bytes'] / 1024:>9.1f} KiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
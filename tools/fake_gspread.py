@@ -0,0 +1,166 @@
+"""Local stand-in for gspread so the data layer can run without network access."""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import gspread
+from gspread.utils import a1_range_to_grid_range
+
+
+class FakeCredentials:
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.token = None
+        self.expiry = None
+        self.refresh_calls = 0
+
+    def refresh(self, request):
+        self.refresh_calls += 1
+        self.token = f"fake-token-{self.refresh_calls}"
+        self.expiry = datetime.utcnow() + timedelta(seconds=self.lifetime)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title):
+        self.spreadsheet = spreadsheet
+        self.title = title
+
+    @property
+    def values(self):
+        return self.spreadsheet.client.sheets[self.title]
+
+    def get_all_values(self):
+        self.spreadsheet.client.call("get_all_values", self.title)
+        return [list(row) for row in self.values]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, url):
+        self.client = client
+        self.url = url
+
+    def worksheet(self, title):
+        self.client.call("worksheet", title)
+        if title not in self.client.sheets:
+            raise gspread.WorksheetNotFound(title)
+        return FakeWorksheet(self, title)
+
+    def get_lastUpdateTime(self):
+        self.client.call("get_lastUpdateTime")
+        return self.client.modified_time
+
+    def values_batch_get(self, ranges, params=None):
+        self.client.call("values_batch_get", tuple(ranges))
+        value_ranges = []
+        for range_name in ranges:
+            title, _, cells = range_name.partition("!")
+            rows = self.client.sheets[title.strip("'")]
+            if cells:
+                grid = a1_range_to_grid_range(cells)
+                grid_rows = max(len(rows), 1) + self.client.spare_rows
+                if grid.get("startRowIndex", 0) >= grid_rows:
+                    raise gspread.exceptions.APIError(FakeResponse(
+                        400, f"Range ({range_name}) exceeds grid limits. Max rows: {grid_rows}"))
+                rows = [row[grid.get("startColumnIndex", 0):grid.get("endColumnIndex")]
+                        for row in rows[grid.get("startRowIndex", 0):grid.get("endRowIndex")]]
+            rows = [trim_row(row) for row in rows]
+            # Empty trailing rows are left out as well
+            while rows and not rows[-1]:
+                rows.pop()
+            value_ranges.append({"range": range_name, "majorDimension": "ROWS", "values": rows})
+        return {"spreadsheetId": "fake", "valueRanges": value_ranges}
+
+
+class FakeResponse:
+    #Just enough of a requests.Response for gspread.exceptions.APIError
+    def __init__(self, status_code, message):
+        self.status_code = status_code
+        self.text = message
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text}}
+
+
+def trim_row(row):
+    #The Sheets API leaves out empty trailing cells
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+class FakeClient:
+    """Serves `sheets`, a dict of worksheet title -> list of rows (header row first).
+
+    Every API call sleeps for `latency` seconds to mimic a network round trip. With a
+    `quota`, calls beyond that many per `window` seconds fail with HTTP 429 like the
+    Sheets per-minute quota; `inject_errors` makes the next calls fail outright. Every
+    grid has `spare_rows` empty rows below the data, ranges starting below them fail
+    with HTTP 400 like the API.
+    """
+
+    def __init__(self, sheets, latency=0, quota=None, window=60, spare_rows=0):
+        self.sheets = dict(sheets)
+        self.spare_rows = spare_rows
+        self.latency = latency
+        self.quota = quota
+        self.window = window
+        self.calls = []
+        self.rejected = []
+        self.revision = 1
+        self._accepted = deque()
+        self._errors = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def modified_time(self):
+        return (datetime(2024, 1, 1) + timedelta(minutes=self.revision)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def update_sheet(self, title, values):
+        #Replace a worksheet's rows and bump the Drive modifiedTime
+        self.sheets[title] = values
+        self.revision += 1
+
+    def inject_errors(self, count, status=429):
+        #The next `count` API calls fail with `status`
+        with self._lock:
+            self._errors.extend([status] * count)
+
+    def _error_status(self):
+        with self._lock:
+            if self._errors:
+                return self._errors.popleft()
+            if self.quota is not None:
+                now = time.monotonic()
+                while self._accepted and self._accepted[0] <= now - self.window:
+                    self._accepted.popleft()
+                if len(self._accepted) >= self.quota:
+                    return 429
+                self._accepted.append(now)
+            return None
+
+    def call(self, name, *args):
+        self.calls.append((name,) + args)
+        if self.latency:
+            time.sleep(self.latency)
+        status = self._error_status()
+        if status is not None:
+            self.rejected.append((name, status))
+            raise gspread.exceptions.APIError(FakeResponse(status, f"Fake {name} failed with HTTP {status}"))
+
+    def open_by_url(self, url):
+        self.call("open_by_url", url)
+        return FakeSpreadsheet(self, url)
+
+
+def fake_connect(sheets, lifetime=3600, latency=0, quota=None, window=60):
+    #Returns a `connect` callable for sheets.SheetsResource backed by a FakeClient
+    client = FakeClient(sheets, latency, quota, window)
+
+    def connect(creds_dict):
+        return client, FakeCredentials(lifetime)
+
+    connect.client = client
+    return connect
@@ -0,0 +1,72 @@
+"""Import time of the modules the dashboard loads before its first paint.
+
+    python -m tools.import_profile [--top 15] [--repeat 3] [--output results.json]
+
+Imports what final_script.py imports at the top in a fresh interpreter under
+`python -X importtime`, and prints the slowest top-level imports by cumulative time
+from the fastest of --repeat runs. Also lists which of the libraries that only one
+section needs (gspread and google-auth for the Sheets API, plotly.express for the
+Gantt) got loaded on the way; after a clean start none of them should be.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Top-level imports of final_script.py
+STARTUP_MODULES = ["pandas", "plotly.graph_objects", "streamlit", "sheets", "settings", "pipeline", "schema",
+                   "charts", "figure_cache", "metrics", "snapshots"]
+# Imported by the code that needs them, not at startup
+DEFERRED_MODULES = ["gspread", "google.oauth2.service_account", "google.auth.transport.requests", "plotly.express",
+                    "streamlit_gsheets"]
+
+
+def parse_importtime(stderr):
+    #[(module, depth, self_us, cumulative_us)] in the order -X importtime prints them
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile_imports(modules, deferred):
+    #One fresh interpreter: the import rows and the deferred modules that got loaded anyway
+    code = "\n".join([f"import {module}" for module in modules] + [
+        "import json, sys",
+        f"print(json.dumps([m for m in {deferred!r} if m in sys.modules]))",
+    ])
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr), json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = [profile_imports(STARTUP_MODULES, DEFERRED_MODULES) for _ in range(args.repeat)]
+    rows, loaded = min(runs, key=lambda run: sum(row[3] for row in run[0] if row[1] == 0))
+    top_level = sorted((row for row in rows if row[1] == 0), key=lambda row: row[3], reverse=True)
+    total_us = sum(row[3] for row in top_level)
+
+    print(f"Startup imports: {total_us / 1000:.0f} ms over {len(rows)} modules (best of {args.repeat})")
+    for name, _, _, cumulative_us in top_level[:args.top]:
+        print(f"  {name:<40} {cumulative_us / 1000:>8.1f} ms")
+    print(f"Deferred modules loaded at startup: {', '.join(loaded) or 'none'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"total_ms": total_us / 1000, "modules": len(rows), "deferred_loaded": loaded,
+                       "top_level": [{"module": name, "cumulative_ms": us / 1000} for name, _, _, us in top_level]}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Per-column memory of the worksheets as fetched (all strings) against their typed schema.
+
+    python -m tools.schema_report [--experiments 2000] [--weeks 150] [--weekly-rows 500] [--output report.csv]
+
+Types synthetic Experiments and Weekly sheets with schema.apply_schema and prints
+schema.memory_footprint for each: dtype and deep bytes of every column before and after,
+plus the totals. The dashboard itself doesn't measure this on load, deep introspection
+of both frames costs about as much as the typing.
+"""
+
+import argparse
+
+import pandas as pd
+
+from schema import apply_schema, memory_footprint
+from sheets import frame_from_values
+from tools.synthetic import synthetic_sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--experiments", type=int, default=2000)
+    parser.add_argument("--weeks", type=int, default=150)
+    parser.add_argument("--weekly-rows", type=int, default=500)
+    parser.add_argument("--output", help="also write the reports as CSV to this file")
+    args = parser.parse_args()
+
+    sheets = synthetic_sheets(args.experiments, args.weeks, args.weekly_rows)
+    reports = []
+    for name, rows in sheets.items():
+        raw = frame_from_values(rows)
+        report = memory_footprint(raw, apply_schema(name, raw))
+        print(f"{name}: {len(raw)} rows")
+        print(report.to_string(), end="\n\n")
+        reports.append(report.rename_axis("column").reset_index().assign(sheet=name))
+
+    if args.output:
+        pd.concat(reports).to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Synthetic Experiments and Weekly worksheets in the layout of the real spreadsheet.
+
+Rows are lists of strings with the header row first, as returned by get_all_values(),
+so they can be served by tools.fake_gspread and go through the same loading code.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+# Trailing blank headers like the real sheet has, unique_headers turns them into "", "_1"
+EXPERIMENT_HEADERS = ['INITIATIVE', 'CITY', 'PRIMARY METRIC', 'SUB DOMAIN', 'HYPOTHESIS', 'OWNER', 'START DATE',
+                      'END DATE', 'NOTES', 'STAGE', 'Experiment Doc Link', '', '']
+WEEKLY_LABEL_HEADERS = ['INITIATIVE', 'CITY', 'PLATFORM', 'OWNER']
+
+CITY_NAMES = ['Dubai', 'Riyadh', 'Cairo', 'Karachi', 'Amman', 'Doha', 'Lahore', 'Jeddah', 'Abu Dhabi', 'Kuwait City']
+METRICS = ['GMV', 'Conversion', 'Retention', 'AOV', 'Orders per User']
+SUB_DOMAINS = ['Pricing', 'Growth', 'Ops', 'Supply', 'Loyalty']
+EXPERIMENT_STAGES = ['Running', 'Completed', 'Paused']
+ROLLOUT_STAGES = ['In Experiment', 'Awaiting Results', 'Rollout', 'No Rollout', 'Paused']
+PLATFORMS = ['iOS', 'Android']
+
+
+def city_names(cities):
+    #The real city names first, numbered ones beyond them
+    return [CITY_NAMES[i] if i < len(CITY_NAMES) else f"City {i + 1}" for i in range(cities)]
+
+
+def initiative_names(initiatives):
+    return [f"Initiative {i + 1}" for i in range(initiatives)]
+
+
+def experiments_sheet(experiments, cities=5, initiatives=12, first_day=date(2022, 1, 1), days=1500, seed=0):
+    """Header row plus one row per experiment, dates written as 2024-01-31 like the sheet."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(first_day) + rng.integers(0, days, experiments).astype("timedelta64[D]")
+    end = start + rng.integers(7, 90, experiments).astype("timedelta64[D]")
+    columns = {
+        'INITIATIVE': rng.choice(initiative_names(initiatives), experiments),
+        'CITY': rng.choice(city_names(cities), experiments),
+        'PRIMARY METRIC': rng.choice(METRICS, experiments),
+        'SUB DOMAIN': rng.choice(SUB_DOMAINS, experiments),
+        'START DATE': start.astype(str),
+        'END DATE': end.astype(str),
+        'STAGE': rng.choice(EXPERIMENT_STAGES, experiments, p=[0.2, 0.7, 0.1]),
+    }
+    rows = [EXPERIMENT_HEADERS]
+    for i in range(experiments):
+        rows.append([columns['INITIATIVE'][i], columns['CITY'][i], columns['PRIMARY METRIC'][i],
+                     columns['SUB DOMAIN'][i], 'Hypothesis', 'Owner', columns['START DATE'][i],
+                     columns['END DATE'][i], '', columns['STAGE'][i], f"https://docs.example.com/{i}", '', ''])
+    return rows
+
+
+def week_headers(weeks, first_week=date(2023, 1, 2)):
+    #"WEEK 1\n2023-01-02 to 2023-01-08", the format parse_week_headers reads
+    return [f"WEEK {w + 1}\n{first_week + timedelta(weeks=w)} to {first_week + timedelta(weeks=w, days=6)}"
+            for w in range(weeks)]
+
+
+def weekly_sheet(rows, weeks, cities=5, initiatives=12, change_rate=0.25, seed=0):
+    """Header row plus `rows` rollout rows of `weeks` stage cells.
+
+    Only the first row of each initiative block carries the INITIATIVE name (the sheet
+    relies on fill-down). A cell keeps the previous week's stage except with probability
+    `change_rate`, when it switches to a random stage or to blank.
+    """
+    rng = np.random.default_rng(seed)
+    stages = np.array(ROLLOUT_STAGES + [''], dtype=object)
+    picks = stages[rng.integers(0, len(stages), size=(rows, weeks))]
+    # Carry each pick forward until the next change, so stages come in runs like the real grid
+    changes = rng.random((rows, weeks)) < change_rate
+    changes[:, 0] = True
+    last_change = np.maximum.accumulate(np.where(changes, np.arange(weeks), 0), axis=1)
+    grid = np.take_along_axis(picks, last_change, axis=1)
+
+    names = initiative_names(initiatives)
+    city_list = city_names(cities)
+    platforms = len(PLATFORMS)
+    sheet = [WEEKLY_LABEL_HEADERS + week_headers(weeks)]
+    for r in range(rows):
+        block, platform = divmod(r, platforms)
+        initiative = names[block % len(names)] if platform == 0 else ''
+        city = city_list[(block // len(names)) % len(city_list)]
+        sheet.append([initiative, city, PLATFORMS[platform], 'Owner'] + grid[r].tolist())
+    return sheet
+
+
+def synthetic_sheets(experiments=2000, weeks=150, weekly_rows=500, cities=5, initiatives=12, seed=0):
+    #{worksheet title: rows} for tools.fake_gspread.FakeClient
+    return {
+        "Experiments": experiments_sheet(experiments, cities, initiatives, seed=seed),
+        "Weekly": weekly_sheet(weekly_rows, weeks, cities, initiatives, seed=seed),
+    }